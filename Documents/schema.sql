@@ -58,3 +58,67 @@ CREATE TABLE Referencetypes (
     referencetype TEXT NOT NULL
 );
 
+
+-- Schema version 2 (PRAGMA user_version = 2)
+
+CREATE UNIQUE INDEX Authors_author_idx ON Authors (author);
+CREATE UNIQUE INDEX Institutions_institution_idx ON Institutions (institution);
+CREATE UNIQUE INDEX Booktitles_booktitle_idx ON Booktitles (booktitle);
+CREATE UNIQUE INDEX Editors_editor_idx ON Editors (editor);
+CREATE UNIQUE INDEX Series_series_idx ON Series (series);
+CREATE UNIQUE INDEX Types_type_idx ON Types (type);
+CREATE UNIQUE INDEX Referencetypes_referencetype_idx ON Referencetypes (referencetype);
+
+CREATE INDEX Bibrefs_author_id_idx ON Bibrefs (author_id);
+CREATE INDEX Bibrefs_institution_id_idx ON Bibrefs (institution_id);
+CREATE INDEX Bibrefs_booktitle_id_idx ON Bibrefs (booktitle_id);
+CREATE INDEX Bibrefs_editor_id_idx ON Bibrefs (editor_id);
+CREATE INDEX Bibrefs_series_id_idx ON Bibrefs (series_id);
+CREATE INDEX Bibrefs_type_id_idx ON Bibrefs (type_id);
+CREATE INDEX Bibrefs_referencetype_id_idx ON Bibrefs (referencetype_id);
+CREATE INDEX Bibrefs_year_idx ON Bibrefs (year);
+
+-- Schema version 3
+
+CREATE VIRTUAL TABLE BibrefsSearch USING fts5 (
+    title, author, venue, note, annote,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+-- Kept in sync with Bibrefs by triggers Bibrefs_search_insert,
+-- Bibrefs_search_update and Bibrefs_search_delete, see initialize_database.py
+
+-- Schema version 4
+
+CREATE TABLE ImportedEntries (
+    key TEXT PRIMARY KEY REFERENCES Bibrefs,
+    source TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    missing INT NOT NULL DEFAULT 0
+);
+CREATE INDEX ImportedEntries_source_idx ON ImportedEntries (source);
+-- Rows are removed with their reference by trigger Bibrefs_imported_delete
+
+-- Schema version 5
+
+CREATE TABLE ImportCheckpoints (
+    source TEXT PRIMARY KEY,
+    offset INT NOT NULL,
+    entries INT NOT NULL
+);
+
+-- Schema version 6
+
+ALTER TABLE Bibrefs ADD COLUMN bibtex TEXT;
+-- Rendered BibTeX text of the reference, written by the repository whenever
+-- the reference is saved, updated or imported. Trigger Bibrefs_search_update
+-- now fires only on UPDATE OF title, author_id, journal, booktitle_id, note, annote.
+
+-- Schema version 7
+
+CREATE VIRTUAL TABLE BibrefsTrigrams USING fts5 (
+    author, title,
+    tokenize = 'trigram'
+);
+CREATE VIRTUAL TABLE BibrefsTrigramsVocab USING fts5vocab (BibrefsTrigrams, 'row');
+-- Fuzzy search index, kept in sync with Bibrefs by triggers Bibrefs_trigram_insert,
+-- Bibrefs_trigram_update and Bibrefs_trigram_delete, see initialize_database.py
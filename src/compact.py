@@ -0,0 +1,11 @@
+""" Module to compact database file """
+from repositories.reference_repository import ReferenceRepository
+
+
+def compact():
+    """ Calls compact of ReferenceRepository """
+    deleted = ReferenceRepository().compact()
+    print(f"Removed {deleted} unused rows")
+
+if __name__ == "__main__":
+    compact()
@@ -12,3 +12,11 @@ except FileNotFoundError:
 
 DATABASE_FILENAME = os.getenv("DATABASE_FILENAME") or "database.sqlite"
 DATABASE_FILE_PATH = os.path.join(dirname, "..", "data", DATABASE_FILENAME)
+
+# SQLite PRAGMAs applied to every database connection
+DATABASE_SYNCHRONOUS = os.getenv("DATABASE_SYNCHRONOUS") or "NORMAL"
+# Negative value is in KiB, positive in pages
+DATABASE_CACHE_SIZE = int(os.getenv("DATABASE_CACHE_SIZE") or -64000)
+DATABASE_MMAP_SIZE = int(os.getenv("DATABASE_MMAP_SIZE") or 268435456)
+# Milliseconds to wait for a lock held by another connection
+DATABASE_BUSY_TIMEOUT = int(os.getenv("DATABASE_BUSY_TIMEOUT") or 5000)
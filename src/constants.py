@@ -12,6 +12,12 @@ UNSUITABLE_COMMAND_ERROR = "Unsuitable command"
 KEY_DOES_NOT_EXIST_ERROR = "Key does not exist"
 INVALID_REFERENCE_TYPE_ERROR = "Invalid reference type"
 KEY_ALREADY_EXISTS_ERROR = "Key already exists"
+INVALID_SEARCH_FIELD_ERROR = "Field is not searchable"
+INVALID_ORDER_ERROR = "Order must be asc or desc"
+INVALID_SHARD_FIELD_ERROR = "References can be split only by year or referencetype"
+INVALID_COMPRESSION_ERROR = "Compression must be gzip or xz"
+INVALID_QUERY_FIELD_ERROR = "References can not be queried or sorted by the field"
+NUMPY_MISSING_ERROR = "Columnar snapshot needs NumPy, install it with pip install numpy"
 
 INPROCEEDINGS_KEYS = ["title", "author", "booktitle", "year",
                       "editor", "volume", "series", "pages", "address",
@@ -29,4 +35,34 @@ PHD_KEYS = [ "author", "title", "school", "year", "type", "address", "month", "n
 PHD_MANDATORY_KEYS = set([ "author", "title", "school", "year"])
 
 NUMBER_KEYS = set(["year", "volume"])
+
+# Fields references can be queried and sorted by
+QUERY_FIELDS = ["key", "title", "author", "year", "journal", "booktitle"]
+
+SEARCH_RESULT_LIMIT = 200
+
+# Share of trigrams of a fuzzy search a field must contain, how many of the
+# rarest trigrams select candidates and how many best candidates are scored
+FUZZY_SEARCH_THRESHOLD = 0.5
+FUZZY_TRIGRAM_LIMIT = 12
+FUZZY_CANDIDATE_LIMIT = 1000
+
+# Keys fetched at a time in the list by key screen, and how close to
+# the end of loaded keys the next page is fetched
+KEY_PAGE_SIZE = 100
+KEY_PAGE_PRELOAD = 20
+
+# Entries parsed, validated and saved at a time when importing a file
+IMPORT_BATCH_SIZE = 1000
+# Processes parsing and validating batches in the GUI
+IMPORT_WORKERS = os.cpu_count() or 1
+
+# Rows rendered at a time and size of the write buffer in bytes when exporting
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_BUFFER_SIZE = 1024 * 1024
+# Processes writing files when exporting, each compresses one file at a time
+EXPORT_WORKERS = os.cpu_count() or 1
+
+# Threads running database calls for the GUI
+DATABASE_WORKERS = 4
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -1,10 +1,45 @@
-""" Module to initialize database connection"""
+""" Module to initialize database connections
+
+Every thread gets its own connection, so background workers can read
+while another thread writes. A connection is closed when its thread
+ends and the thread-local storage is released. Connections use WAL journaling.
+"""
+import os
 import sqlite3
-from config import DATABASE_FILE_PATH
+import threading
+from config import DATABASE_FILE_PATH, DATABASE_SYNCHRONOUS, DATABASE_CACHE_SIZE, \
+    DATABASE_MMAP_SIZE, DATABASE_BUSY_TIMEOUT
 
-connection = sqlite3.connect(DATABASE_FILE_PATH)
-connection.row_factory = sqlite3.Row
+_thread_connections = threading.local()
+
+
+def casefold(value):
+    """ SQL function casefold(value) folding case of any text like str.casefold,
+    unlike LIKE and lower() of SQLite that fold only ASCII letters """
+    return None if value is None else str(value).casefold()
+
+
+def create_database_connection():
+    """ Opens new database connection with configured PRAGMAs """
+    connection = sqlite3.connect(DATABASE_FILE_PATH, timeout=DATABASE_BUSY_TIMEOUT / 1000)
+    connection.row_factory = sqlite3.Row
+    connection.create_function("casefold", 1, casefold, deterministic=True)
+
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute(f"PRAGMA synchronous = {DATABASE_SYNCHRONOUS}")
+    connection.execute(f"PRAGMA cache_size = {DATABASE_CACHE_SIZE}")
+    connection.execute(f"PRAGMA mmap_size = {DATABASE_MMAP_SIZE}")
+    connection.execute(f"PRAGMA busy_timeout = {DATABASE_BUSY_TIMEOUT}")
 
-def get_database_connection():
-    """ Returns database connection """
     return connection
+
+
+def get_database_connection():
+    """ Returns database connection of the current thread,
+    opens it on first use """
+    # Connections are not shared with forked child processes either
+    if getattr(_thread_connections, "pid", None) != os.getpid():
+        _thread_connections.connection = create_database_connection()
+        _thread_connections.pid = os.getpid()
+
+    return _thread_connections.connection
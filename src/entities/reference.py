@@ -1,5 +1,6 @@
 """Module for the Reference class"""
 from enum import Enum
+from collections.abc import MutableMapping
 from constants import NUMBER_KEYS, INPROCEEDINGS_KEYS, INPROCEEDINGS_MANDATORY_KEYS, \
     TECHREPORT_KEYS, TECHREPORT_MANDATORY_KEYS, ARTICLE_KEYS, ARTICLE_MANDATORY_KEYS, \
     PHD_KEYS, PHD_MANDATORY_KEYS
@@ -45,20 +46,117 @@ class ReferenceType(Enum):
         return [t.value for t in cls]
 
 
+# Reference type -> {field: bit of the field in the layout of the type}
+FIELD_BITS = {reference_type: {field: 1 << index
+                               for index, field in enumerate(reference_type.get_keys())}
+              for reference_type in ReferenceType}
+
+
+class ReferenceFields(MutableMapping):
+    """Dictionary-like view to the fields of a reference.
+    Fields are kept in the layout order of the reference type and
+    setting a field to None removes it.
+
+    Args:
+        reference (Reference): Reference the fields belong to
+    """
+    __slots__ = ("_reference",)
+
+    def __init__(self, reference):
+        self._reference = reference
+
+    def _bit(self, field):
+        return FIELD_BITS[self._reference.reference_type].get(field, 0)
+
+    def _index(self, bit):
+        # Values are stored only for present fields, so the position of a
+        # field is the amount of present fields before it in the layout
+        return (self._reference.present & (bit - 1)).bit_count()
+
+    def __getitem__(self, field):
+        bit = self._bit(field)
+        if not self._reference.present & bit:
+            raise KeyError(field)
+        return self._reference.values[self._index(bit)]
+
+    def __setitem__(self, field, value):
+        if value is None:
+            self.pop(field, None)
+            return
+        bit = self._bit(field)
+        if not bit:
+            raise KeyError(field)
+        reference = self._reference
+        index = self._index(bit)
+        values = reference.values
+        if reference.present & bit:
+            reference.values = values[:index] + (value,) + values[index + 1:]
+        else:
+            reference.values = values[:index] + (value,) + values[index:]
+            reference.present |= bit
+
+    def __delitem__(self, field):
+        bit = self._bit(field)
+        if not self._reference.present & bit:
+            raise KeyError(field)
+        reference = self._reference
+        index = self._index(bit)
+        reference.values = reference.values[:index] + reference.values[index + 1:]
+        reference.present &= ~bit
+
+    def __iter__(self):
+        present = self._reference.present
+        return (field for field, bit in FIELD_BITS[self._reference.reference_type].items()
+                if present & bit)
+
+    def __len__(self):
+        return self._reference.present.bit_count()
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
 class Reference:
     """Class for references.
 
+    Only fields that have a value are stored, in the fixed field
+    layout of the reference type.
+
     Args:
         reference_type (ReferenceType): type of reference
         key (str): unique identifier for reference
         fields (dict): field-value pairs for reference
+    Raises:
+        KeyError: Raises, if a field is not in the layout of the type
+
+    Attributes:
+        present (int): Bits of the fields that have a value
+        values (tuple): Values of the present fields in layout order
     """
+    __slots__ = ("reference_type", "key", "present", "values")
 
     def __init__(self, reference_type: ReferenceType, key: str, fields: dict):
         self.reference_type = reference_type
         self.key = key
         self.fields = fields
 
+    @property
+    def fields(self):
+        """ReferenceFields: Field-value pairs of the reference"""
+        return ReferenceFields(self)
+
+    @fields.setter
+    def fields(self, fields):
+        bits = FIELD_BITS[self.reference_type]
+        present = 0
+        for field, value in fields.items():
+            if value is not None:
+                if field not in bits:
+                    raise KeyError(field)
+                present |= bits[field]
+        self.present = present
+        self.values = tuple(fields[field] for field, bit in bits.items() if present & bit)
+
     def __str__(self):
         bibtex_fields = []
         for key, value in self.fields.items():
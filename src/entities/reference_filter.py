@@ -0,0 +1,33 @@
+"""Module for the ReferenceFilter class"""
+from entities.reference import ReferenceType
+from entities.reference_query import And, Contains, YearBetween, TypeIn, KeyIn, TextSearch
+
+
+class ReferenceFilter(And):
+    """Conditions for selecting references from the database.
+    Only given conditions are used and references must meet all of them.
+
+    Args:
+        author (str, optional): Part of author, case is ignored
+        year_from (int, optional): First year included
+        year_to (int, optional): Last year included
+        reference_type (ReferenceType, optional): Type of reference
+        keys (list, optional): Keys of references
+        query (str, optional): Words searched from the full-text index,
+        matched as beginnings of words like in ReferenceRepository.search
+    """
+
+    def __init__(self, *, author=None, year_from=None, year_to=None,
+                 reference_type: ReferenceType = None, keys=None, query=None):
+        conditions = []
+        if author:
+            conditions.append(Contains("author", author))
+        if year_from is not None or year_to is not None:
+            conditions.append(YearBetween(year_from, year_to))
+        if reference_type is not None:
+            conditions.append(TypeIn(reference_type))
+        if keys is not None:
+            conditions.append(KeyIn(keys))
+        if query and query.split():
+            conditions.append(TextSearch(query))
+        super().__init__(*conditions)
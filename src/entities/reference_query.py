@@ -0,0 +1,219 @@
+"""Module for composable reference query conditions"""
+import re
+import unicodedata
+from abc import ABC, abstractmethod
+from entities.reference import ReferenceType
+from constants import QUERY_FIELDS, INVALID_QUERY_FIELD_ERROR
+
+
+def field_value(reference, field):
+    """Returns value of a query field of a reference, key included"""
+    if field == "key":
+        return reference.key
+    return reference.fields.get(field)
+
+
+def normalize_text(text):
+    """Returns text in lowercase words without diacritics and punctuation"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(re.findall(r"[^\W_]+", stripped))
+
+
+def check_field(field):
+    """Raises ValueError, if references can not be queried by field"""
+    if field not in QUERY_FIELDS:
+        raise ValueError(INVALID_QUERY_FIELD_ERROR)
+
+
+class Condition(ABC):
+    """Base class of query conditions.
+    Conditions are combined with & and | into And and Or conditions.
+    """
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    @abstractmethod
+    def matches(self, reference) -> bool:
+        """Evaluates condition for a loaded reference
+
+        Args:
+            reference (Reference): Reference evaluated
+        Returns:
+            bool: True, if reference meets the condition
+        """
+
+
+class Contains(Condition):
+    """Field contains text, case is ignored also outside ASCII
+
+    Args:
+        field (str): One of QUERY_FIELDS
+        text (str): Text searched
+    Raises:
+        ValueError: Raises, if field can not be queried
+    """
+
+    def __init__(self, field, text):
+        check_field(field)
+        self.field = field
+        self.text = text
+
+    def matches(self, reference):
+        value = field_value(reference, self.field)
+        return value is not None and self.text.casefold() in str(value).casefold()
+
+
+class Matches(Condition):
+    """Field matches regular expression, case is ignored.
+    SQL can not express it, so it is evaluated for loaded references.
+
+    Args:
+        field (str): One of QUERY_FIELDS
+        pattern (str): Regular expression searched from the value
+    Raises:
+        ValueError: Raises, if field can not be queried
+    """
+
+    def __init__(self, field, pattern):
+        check_field(field)
+        self.field = field
+        self.pattern = re.compile(pattern, re.IGNORECASE)
+
+    def matches(self, reference):
+        value = field_value(reference, self.field)
+        return value is not None and self.pattern.search(str(value)) is not None
+
+
+class YearBetween(Condition):
+    """Year is set and within a range
+
+    Args:
+        year_from (int, optional): First year included
+        year_to (int, optional): Last year included
+    """
+
+    def __init__(self, year_from=None, year_to=None):
+        self.year_from = year_from
+        self.year_to = year_to
+
+    def matches(self, reference):
+        year = reference.fields.get("year")
+        return year is not None and \
+            (self.year_from is None or year >= self.year_from) and \
+            (self.year_to is None or year <= self.year_to)
+
+
+class TypeIn(Condition):
+    """Reference is of one of given types
+
+    Args:
+        reference_types (ReferenceType): Types accepted
+    """
+
+    def __init__(self, *reference_types: ReferenceType):
+        self.reference_types = reference_types
+
+    def matches(self, reference):
+        return reference.reference_type in self.reference_types
+
+
+class KeyStartsWith(Condition):
+    """Key starts with prefix, case sensitive like keys
+
+    Args:
+        prefix (str): Beginning of the key
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def matches(self, reference):
+        return reference.key.startswith(self.prefix)
+
+
+class KeyIn(Condition):
+    """Key is one of given keys
+
+    Args:
+        keys (iterable): Keys accepted
+    """
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+
+    def matches(self, reference):
+        return reference.key in self.keys
+
+
+class TextSearch(Condition):
+    """Every word is the beginning of a word in title, author, journal or
+    booktitle, note or annote, matched with the full-text index like
+    ReferenceRepository.search
+
+    Args:
+        query (str): Words searched
+    """
+    FIELDS = ("title", "author", "journal", "booktitle", "note", "annote")
+
+    def __init__(self, query):
+        self.query = query
+
+    def matches(self, reference):
+        words = normalize_text(" ".join(str(reference.fields.get(field) or "")
+                                        for field in self.FIELDS)).split()
+        return all(any(word.startswith(prefix) for word in words)
+                   for prefix in normalize_text(self.query).split())
+
+
+class And(Condition):
+    """Every condition is met
+
+    Args:
+        conditions (Condition): Conditions combined
+    """
+
+    def __init__(self, *conditions: Condition):
+        self.conditions = conditions
+
+    def matches(self, reference):
+        return all(condition.matches(reference) for condition in self.conditions)
+
+
+class Or(Condition):
+    """At least one condition is met
+
+    Args:
+        conditions (Condition): Conditions combined
+    """
+
+    def __init__(self, *conditions: Condition):
+        self.conditions = conditions
+
+    def matches(self, reference):
+        return any(condition.matches(reference) for condition in self.conditions)
+
+
+class ReferenceQuery:
+    """Query selecting, sorting and limiting references
+
+    Args:
+        condition (Condition, optional): Condition references must meet,
+        None matches every reference
+        order_by (list, optional): Fields sorted by, descending if prefixed with "-".
+        Ties are sorted by key.
+        limit (int, optional): Maximum amount of references returned
+    Raises:
+        ValueError: Raises, if a sorted field can not be queried
+    """
+
+    def __init__(self, condition: Condition = None, *, order_by=("key",), limit=None):
+        for field in order_by:
+            check_field(field.removeprefix("-"))
+        self.condition = condition
+        self.order_by = list(order_by)
+        self.limit = limit
@@ -0,0 +1,17 @@
+""" Module to export references split into compressed files """
+import os
+import sys
+from services.reference_exporter import export_shards
+from constants import EXPORT_WORKERS
+
+
+def export(directory, field="year", compression="gzip", workers=EXPORT_WORKERS):
+    """ Calls export_shards with EXPORT_WORKERS processes unless workers is given,
+    compression "none" saves plain files """
+    os.makedirs(directory, exist_ok=True)
+    compression = None if compression == "none" else compression
+    manifest = export_shards(directory, field, compression, int(workers))
+    print(f"Exported {manifest['entries']} references into {len(manifest['files'])} files")
+
+if __name__ == "__main__":
+    export(*sys.argv[1:])
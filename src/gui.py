@@ -5,16 +5,19 @@
         Screen: Textual Screen Widgets
     """
 
+import os
 from textual.binding import Binding
 from textual.app import App,  ComposeResult
 from textual.events import Key
 from textual.widget import Widget
 from textual.widgets import Header, Footer, Button
 from screens.confirmation_screen import ConfirmationScreen
+from screens.import_progress import ImportProgress
 from screens.add_reference import AddReference
 from screens.list_keys import ListKeys
 from screens.show_all import ShowAll
 from services.reference_services import ReferenceServices
+from services.async_reference_services import AsyncReferenceServices
 from repositories.reference_repository import ReferenceRepository
 
 
@@ -54,12 +57,14 @@ class GUI(App[None]):
         self.title = "Vault of References"
         self.reference_repository = reference_repository
         self.reference_services = reference_services
+        self.async_services = AsyncReferenceServices(reference_repository, reference_services)
         self.file_dialog = file_dialog
         self.buttons = [
             Button("Show all references", id="toBibtex"),
             Button("List by key", id="listAll"),
             Button("Add new reference", id="addNew"),
             Button("Add references from .bib file", id="addFromBib"),
+            Button("Add references from folder", id="addFromDir"),
             Button("Save references to .bib file", id="saveToBib")
         ]
 
@@ -70,6 +75,7 @@ class GUI(App[None]):
                 ("l", "list_references", "List by key"),
                 ("a", "add_reference", "Add"),
                 ("f", "add_from_bib", "Add from BibTeX file"),
+                ("m", "add_from_directory", "Add from folder"),
                 ("o", "save_to_bib", "Save to BibTeX file"),
                 Binding("t", "test_screen", "test", show=False)
                 ]
@@ -80,7 +86,7 @@ class GUI(App[None]):
         yield NavigableButtonContainer(self.buttons, _id="mainmenu")
         yield Footer()
 
-    def on_button_pressed(self, event: Button.Pressed):
+    async def on_button_pressed(self, event: Button.Pressed):
         """Tracks button press events and
         calls for approriate method
 
@@ -88,29 +94,33 @@ class GUI(App[None]):
             event (Button.Pressed): Textual event message
         """
         if event.button.id == "toBibtex":
-            self.action_show_all()
+            await self.action_show_all()
         elif event.button.id == "listAll":
-            self.action_list_references()
+            await self.action_list_references()
         elif event.button.id == "addNew":
             self.action_add_reference()
         elif event.button.id == "addFromBib":
-            self.action_add_from_bib()
+            await self.action_add_from_bib()
+        elif event.button.id == "addFromDir":
+            await self.action_add_from_directory()
         elif event.button.id == "saveToBib":
-            self.action_save_to_bib()
+            await self.action_save_to_bib()
 
-    def action_show_all(self):
+    async def action_show_all(self):
         """Opens screen that shows all references
         in BibTex format
         """
-        references = self.reference_repository.load_all()
-        self.push_screen(ShowAll(references, self.reference_services))
+        references = await self.async_services.load_all()
+        self.push_screen(ShowAll(references, self.async_services))
 
-    def action_list_references(self):
+    async def action_list_references(self):
         """Opens screen that shows all reference
         keys as optionlist"""
-        references = self.reference_repository.load_all()
-        self.push_screen(ListKeys(references, self.reference_services.delete_reference,
-                         self.reference_services.create_reference))
+        keys = await self.async_services.list_keys()
+        self.push_screen(ListKeys(keys, self.async_services.list_keys,
+                                  self.async_services.load_one,
+                                  self.async_services.delete_reference,
+                                  self.async_services.create_reference))
 
     def action_add_reference(self):
         """Opens screen that shows optionlist for
@@ -118,13 +128,14 @@ class GUI(App[None]):
         self.push_screen(AddReference(
             self.reference_services))
 
-    def action_add_from_bib(self):
+    async def action_add_from_bib(self):
         """Opens dialog box to add references to database from .bib file."""
         file_path = self.file_dialog.askopenfile(
             title="Select BibTeX file to load...",
             filetypes=[("BibTeX files", ["*.bib", "*.txt"]), ("All files", "*.*")])
         if file_path is not None:
-            errors = self.reference_services.add_from_file(file_path.name)
+            errors = await self._import_with_progress(file_path.name,
+                                                      self.async_services.add_from_file)
             self.notify("File loaded")
             if len(errors) > 0:
                 self.notify("Some references couldn't be loaded due to the following errors:",
@@ -132,14 +143,47 @@ class GUI(App[None]):
                 for e in errors:
                     self.notify(f"Key {e[0]}: {e[1]}", timeout=10)
 
-    def action_save_to_bib(self):
+    async def action_add_from_directory(self):
+        """Opens dialog box to add references to database
+        from all .bib files of a folder and its subfolders."""
+        directory = self.file_dialog.askdirectory(title="Select folder of BibTeX files to load...")
+        if isinstance(directory, str) and directory:
+            file_errors = await self._import_with_progress(directory,
+                                                           self.async_services.add_from_files)
+            self.notify(f"{len(file_errors)} files loaded")
+            for path, errors in file_errors.items():
+                if len(errors) > 0:
+                    self.notify(f"{os.path.relpath(path, directory)}: {len(errors)} references "
+                                f"couldn't be loaded, first error: {errors[0][1]}", timeout=10)
+
+    async def _import_with_progress(self, name, import_function):
+        """Runs import showing its progress
+
+        Args:
+            name (str): File or folder to be imported
+            import_function: Awaitable import method of AsyncReferenceServices
+        Returns:
+            Errors returned by import_function
+        """
+        progress_screen = ImportProgress(name)
+        self.push_screen(progress_screen)
+
+        def show_progress(entries, offset, size):
+            self.call_from_thread(progress_screen.update_progress, entries, offset, size)
+
+        # Continues an interrupted import of the same files
+        errors = await import_function(name, resume=True, progress=show_progress)
+        progress_screen.dismiss(True)
+        return errors
+
+    async def action_save_to_bib(self):
         """Saves database to .bib file."""
         file_path = self.file_dialog.asksaveasfilename(
             defaultextension=".bib",
             filetypes=[("BibTeX files", ["*.bib", "*.txt"]), ("All files", "*.*")])
         if isinstance(file_path, str):
             try:
-                self.reference_repository.save_to_file(file_path)
+                await self.async_services.save_to_file(file_path)
                 self.notify(f"Saved to {file_path}")
             except OSError as error:
                 self.notify(f"Error saving file: {error}")
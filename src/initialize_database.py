@@ -1,15 +1,54 @@
 """ Module to initialize database """
 from database_connection import get_database_connection
 
+# Version of the current database schema, stored in PRAGMA user_version.
+# Databases created before versioning have user_version 0 and version 1 tables.
+SCHEMA_VERSION = 8
 
-def create_tables(connection):
-    """ Creating tables"""
+# Normalized lookup tables as (table, column, foreign key column in Bibrefs)
+LOOKUP_TABLES = [
+    ("Authors", "author", "author_id"),
+    ("Institutions", "institution", "institution_id"),
+    ("Booktitles", "booktitle", "booktitle_id"),
+    ("Editors", "editor", "editor_id"),
+    ("Series", "series", "series_id"),
+    ("Types", "type", "type_id"),
+    ("Referencetypes", "referencetype", "referencetype_id")
+]
+
+# Indexed values of a Bibrefs row, and statements keeping the index in sync in triggers
+SEARCH_ROW_SQL = """
+    (SELECT author FROM Authors WHERE id = {row}.author_id),
+    COALESCE({row}.journal, (SELECT booktitle FROM Booktitles WHERE id = {row}.booktitle_id))
+"""
+SEARCH_INSERT_SQL = f"""
+    INSERT INTO BibrefsSearch (rowid, title, author, venue, note, annote)
+    VALUES (new.rowid, new.title, {SEARCH_ROW_SQL.format(row="new")}, new.note, new.annote);
+"""
+SEARCH_DELETE_SQL = "DELETE FROM BibrefsSearch WHERE rowid = old.rowid;"
+TRIGRAM_INSERT_SQL = """
+    INSERT INTO BibrefsTrigrams (rowid, author, title)
+    VALUES (new.rowid, (SELECT author FROM Authors WHERE id = new.author_id), new.title);
+"""
+TRIGRAM_DELETE_SQL = "DELETE FROM BibrefsTrigrams WHERE rowid = old.rowid;"
+
+
+def create_tables(connection, version=SCHEMA_VERSION):
+    """ Creating tables
+
+    Args:
+        connection (sqlite3.Connection): Database connection
+        version (int, optional): Schema version to create, defaults to latest
+    """
 
     # if not connection:
     #     print("error")
 
     cursor = connection.cursor()
 
+    # Lets compaction return free pages, takes effect on a new database file
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
     sql = """
         CREATE TABLE Authors (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -92,8 +131,275 @@ def create_tables(connection):
     """
     cursor.execute(sql)
 
+    cursor.execute("PRAGMA user_version = 1")
     connection.commit()
 
+    upgrade_tables(connection, version)
+
+
+def get_schema_version(connection):
+    """ Returns schema version of the database, 0 if there are no tables """
+    cursor = connection.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'Bibrefs'")
+    if cursor.fetchone() is None:
+        return 0
+
+    cursor.execute("PRAGMA user_version")
+    return max(cursor.fetchone()[0], 1)
+
+
+def upgrade_tables(connection, version=SCHEMA_VERSION):
+    """ Migrates existing tables in place to given schema version.
+    Each migration runs in its own transaction.
+
+    Args:
+        connection (sqlite3.Connection): Database connection
+        version (int, optional): Target schema version, defaults to latest
+    """
+    cursor = connection.cursor()
+    current_version = get_schema_version(connection)
+
+    for next_version in range(current_version + 1, version + 1):
+        cursor.execute("BEGIN")
+        try:
+            MIGRATIONS[next_version](cursor)
+            cursor.execute(f"PRAGMA user_version = {next_version}")
+        except BaseException:
+            connection.rollback()
+            raise
+        connection.commit()
+
+
+def migrate_to_v2(cursor):
+    """ Removes duplicate rows from lookup tables and adds
+    unique indexes to them and indexes to Bibrefs foreign keys and year """
+    for table, column, foreign_key in LOOKUP_TABLES:
+        cursor.execute(f"CREATE INDEX {table}_{column}_tmp ON {table} ({column})")
+
+        # Point references to the first row of each duplicated value
+        sql = f"""
+        UPDATE Bibrefs SET {foreign_key} = (
+            SELECT MIN(duplicate.id) FROM {table} AS original
+            JOIN {table} AS duplicate ON duplicate.{column} = original.{column}
+            WHERE original.id = Bibrefs.{foreign_key})
+        WHERE {foreign_key} IN (
+            SELECT id FROM {table} WHERE id NOT IN (
+                SELECT MIN(id) FROM {table} GROUP BY {column}))
+        """
+        cursor.execute(sql)
+
+        sql = f"""
+        DELETE FROM {table} WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY {column})
+        """
+        cursor.execute(sql)
+
+        cursor.execute(f"DROP INDEX {table}_{column}_tmp")
+        cursor.execute(f"CREATE UNIQUE INDEX {table}_{column}_idx ON {table} ({column})")
+        cursor.execute(f"CREATE INDEX Bibrefs_{foreign_key}_idx ON Bibrefs ({foreign_key})")
+
+    cursor.execute("CREATE INDEX Bibrefs_year_idx ON Bibrefs (year)")
+
+
+def migrate_to_v3(cursor):
+    """ Adds full-text search index over references, kept in sync
+    with Bibrefs by triggers. Index rows share rowid with Bibrefs. """
+    sql = """
+    CREATE VIRTUAL TABLE BibrefsSearch USING fts5 (
+        title, author, venue, note, annote,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """
+    cursor.execute(sql)
+
+    cursor.execute(f"""
+    CREATE TRIGGER Bibrefs_search_insert AFTER INSERT ON Bibrefs BEGIN
+        {SEARCH_INSERT_SQL}
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER Bibrefs_search_delete AFTER DELETE ON Bibrefs BEGIN
+        {SEARCH_DELETE_SQL}
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER Bibrefs_search_update AFTER UPDATE ON Bibrefs BEGIN
+        {SEARCH_DELETE_SQL}
+        {SEARCH_INSERT_SQL}
+    END
+    """)
+
+    cursor.execute(f"""
+    INSERT INTO BibrefsSearch (rowid, title, author, venue, note, annote)
+    SELECT rowid, title, {SEARCH_ROW_SQL.format(row="Bibrefs")}, note, annote FROM Bibrefs
+    """)
+
+
+def migrate_to_v4(cursor):
+    """ Adds content hash and source file of imported references,
+    so that importing the same file again only writes changed entries """
+    sql = """
+    CREATE TABLE ImportedEntries (
+        key TEXT PRIMARY KEY REFERENCES Bibrefs,
+        source TEXT NOT NULL,
+        hash TEXT NOT NULL,
+        missing INT NOT NULL DEFAULT 0
+    )
+    """
+    cursor.execute(sql)
+    cursor.execute("CREATE INDEX ImportedEntries_source_idx ON ImportedEntries (source)")
+
+    cursor.execute("""
+    CREATE TRIGGER Bibrefs_imported_delete AFTER DELETE ON Bibrefs BEGIN
+        DELETE FROM ImportedEntries WHERE key = old.key;
+    END
+    """)
+
+
+def migrate_to_v5(cursor):
+    """ Adds checkpoints of imports, so that an interrupted
+    import can continue from the last saved batch """
+    sql = """
+    CREATE TABLE ImportCheckpoints (
+        source TEXT PRIMARY KEY,
+        offset INT NOT NULL,
+        entries INT NOT NULL
+    )
+    """
+    cursor.execute(sql)
+
+
+# Rows and BibTeX layout of the references when migrating to version 6.
+# Kept fixed here, so that the migration does not change with later code:
+# stored referencetype -> (BibTeX entry type, fields in rendering order)
+V6_SELECT_REFERENCES_SQL = """
+    SELECT Bibrefs.*,
+        (SELECT referencetype FROM Referencetypes WHERE id = referencetype_id) AS referencetype,
+        (SELECT author FROM Authors WHERE id = author_id) AS author,
+        (SELECT institution FROM Institutions WHERE id = institution_id) AS institution,
+        (SELECT booktitle FROM Booktitles WHERE id = booktitle_id) AS booktitle,
+        (SELECT editor FROM Editors WHERE id = editor_id) AS editor,
+        (SELECT type FROM Types WHERE id = type_id) AS type,
+        (SELECT series FROM Series WHERE id = series_id) AS series
+    FROM Bibrefs
+"""
+V6_BIBTEX_LAYOUTS = {
+    "ReferenceType.INPROCEEDINGS": ("inproceedings", [
+        "title", "author", "booktitle", "year", "editor", "volume", "series", "pages",
+        "address", "month", "note"]),
+    "ReferenceType.TECHREPORT": ("techreport", [
+        "title", "author", "institution", "year", "type", "number", "address", "month",
+        "note", "annote"]),
+    "ReferenceType.ARTICLE": ("article", [
+        "title", "author", "journal", "year", "volume", "number", "pages", "month", "note"]),
+    "ReferenceType.PHD": ("phd", [
+        "author", "title", "school", "year", "type", "address", "month", "note"])
+}
+V6_NUMBER_FIELDS = {"year", "volume"}
+
+
+def render_v6_bibtex(row):
+    """ Returns BibTeX text of a row of V6_SELECT_REFERENCES_SQL,
+    None if the reference type is not supported """
+    if row["referencetype"] not in V6_BIBTEX_LAYOUTS:
+        return None
+    entry_type, fields = V6_BIBTEX_LAYOUTS[row["referencetype"]]
+    lines = []
+    for field in fields:
+        if row[field] is None:
+            continue
+        value = row[field] if field in V6_NUMBER_FIELDS else "{" + str(row[field]) + "}"
+        lines.append(f"    {field:<13}= {value}")
+    return f"@{entry_type}{{{row['key']},\n" + ",\n".join(lines) + "\n}\n"
+
+
+def migrate_to_v6(cursor):
+    """ Adds BibTeX text of every reference rendered when the reference
+    is saved, so that export does not render references. Full-text index
+    is updated only when indexed columns change. """
+    cursor.execute("ALTER TABLE Bibrefs ADD COLUMN bibtex TEXT")
+
+    cursor.execute("DROP TRIGGER Bibrefs_search_update")
+    cursor.execute(f"""
+    CREATE TRIGGER Bibrefs_search_update
+    AFTER UPDATE OF title, author_id, journal, booktitle_id, note, annote ON Bibrefs BEGIN
+        {SEARCH_DELETE_SQL}
+        {SEARCH_INSERT_SQL}
+    END
+    """)
+
+    # Render existing references a page at a time in key order
+    last_key = ""
+    while True:
+        cursor.execute(f"""{V6_SELECT_REFERENCES_SQL}
+            WHERE key > ? ORDER BY key LIMIT 1000""", (last_key,))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        last_key = rows[-1]["key"]
+        # References of unsupported types are rendered when exported
+        cursor.executemany("UPDATE Bibrefs SET bibtex = ? WHERE key = ?", [
+            (render_v6_bibtex(row), row["key"]) for row in rows
+            if row["referencetype"] in V6_BIBTEX_LAYOUTS])
+
+
+def migrate_to_v7(cursor):
+    """ Adds trigram index over author and title for fuzzy search,
+    kept in sync with Bibrefs by triggers like the full-text index """
+    cursor.execute("""
+    CREATE VIRTUAL TABLE BibrefsTrigrams USING fts5 (
+        author, title,
+        tokenize = 'trigram'
+    )
+    """)
+    # Amount of references containing each trigram
+    cursor.execute("""
+    CREATE VIRTUAL TABLE BibrefsTrigramsVocab USING fts5vocab (BibrefsTrigrams, 'row')
+    """)
+
+    cursor.execute(f"""
+    CREATE TRIGGER Bibrefs_trigram_insert AFTER INSERT ON Bibrefs BEGIN
+        {TRIGRAM_INSERT_SQL}
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER Bibrefs_trigram_delete AFTER DELETE ON Bibrefs BEGIN
+        {TRIGRAM_DELETE_SQL}
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER Bibrefs_trigram_update AFTER UPDATE OF title, author_id ON Bibrefs BEGIN
+        {TRIGRAM_DELETE_SQL}
+        {TRIGRAM_INSERT_SQL}
+    END
+    """)
+
+    cursor.execute("""
+    INSERT INTO BibrefsTrigrams (rowid, author, title)
+    SELECT Bibrefs.rowid, Authors.author, Bibrefs.title FROM Bibrefs
+    LEFT JOIN Authors ON Bibrefs.author_id = Authors.id
+    """)
+
+
+def migrate_to_v8(cursor):
+    """ Adds key of every imported entry in its source file, so that an entry
+    saved with another key is recognized when the file is imported again.
+    Key is NULL for entries without key. Earlier entries are assumed to
+    have been saved with their key in the file. """
+    cursor.execute("ALTER TABLE ImportedEntries ADD COLUMN entry_key TEXT")
+    cursor.execute("UPDATE ImportedEntries SET entry_key = key")
+
+
+# Schema version -> function migrating the previous version to it
+MIGRATIONS = {
+    2: migrate_to_v2,
+    3: migrate_to_v3,
+    4: migrate_to_v4,
+    5: migrate_to_v5,
+    6: migrate_to_v6,
+    7: migrate_to_v7,
+    8: migrate_to_v8
+}
+
 
 def drop_tables(connection):
     """ Deleting all tables """
@@ -102,6 +408,31 @@ def drop_tables(connection):
 
     cursor = connection.cursor()
 
+    sql = """
+    DROP TABLE IF EXISTS BibrefsSearch
+    """
+    cursor.execute(sql)
+
+    sql = """
+    DROP TABLE IF EXISTS BibrefsTrigramsVocab
+    """
+    cursor.execute(sql)
+
+    sql = """
+    DROP TABLE IF EXISTS BibrefsTrigrams
+    """
+    cursor.execute(sql)
+
+    sql = """
+    DROP TABLE IF EXISTS ImportedEntries
+    """
+    cursor.execute(sql)
+
+    sql = """
+    DROP TABLE IF EXISTS ImportCheckpoints
+    """
+    cursor.execute(sql)
+
     sql = """
     DROP TABLE IF EXISTS Bibrefs
     """
@@ -142,6 +473,7 @@ def drop_tables(connection):
     """
     cursor.execute(sql)
 
+    cursor.execute("PRAGMA user_version = 0")
     connection.commit()
 
 
@@ -150,8 +482,22 @@ def initialize_database():
     connection = get_database_connection()
 
     drop_tables(connection)
+    # Database is empty now, so VACUUM is quick and applies auto_vacuum mode
+    connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    connection.execute("VACUUM")
     create_tables(connection)
 
 
+def upgrade_database():
+    """ Creates missing tables or migrates existing ones to the
+    latest schema version keeping all references """
+    connection = get_database_connection()
+
+    if get_schema_version(connection) == 0:
+        create_tables(connection)
+    else:
+        upgrade_tables(connection)
+
+
 if __name__ == "__main__":
     initialize_database()
@@ -0,0 +1,83 @@
+"""Module for bookkeeping of imported files"""
+from database_connection import get_database_connection
+
+
+class ImportRepository:
+    """Class that reads and updates what has been imported from files.
+    Hashes and checkpoints are written by ReferenceRepository.save_many
+    in the same transaction as the references.
+    """
+
+    @property
+    def _connection(self):
+        """Database connection of the current thread"""
+        return get_database_connection()
+
+    def get_imported_entries(self, source):
+        """Returns content hashes of references imported from a file
+
+        Args:
+            source (str): File the references were imported from
+        Returns:
+            dict: Key -> (hash, missing, entry key) for every reference imported from source,
+            missing is True if the entry was not in the file when last imported and
+            entry key is the key of the entry in the file, None if it had no key
+        """
+        cursor = self._connection.cursor()
+        cursor.execute("""SELECT key, hash, missing, entry_key FROM ImportedEntries
+                       WHERE source = ?""", (source,))
+        return {row["key"]: (row["hash"], bool(row["missing"]), row["entry_key"])
+                for row in cursor}
+
+    def set_missing(self, keys, missing=True):
+        """Flags imported references as missing from their source file or clears the flag
+
+        Args:
+            keys (list): Keys of imported references
+            missing (bool, optional): Value of the flag
+        """
+        cursor = self._connection.cursor()
+        cursor.executemany("UPDATE ImportedEntries SET missing = ? WHERE key = ?",
+                           [(int(missing), key) for key in keys])
+        self._connection.commit()
+
+    def get_missing_keys(self, source=None):
+        """Returns keys of imported references flagged missing from their source file
+
+        Args:
+            source (str, optional): Only references imported from this file
+        Returns:
+            list: Keys in alphabetical order
+        """
+        cursor = self._connection.cursor()
+        sql = "SELECT key FROM ImportedEntries WHERE missing = 1"
+        params = ()
+        if source is not None:
+            sql += " AND source = ?"
+            params = (source,)
+        cursor.execute(sql + " ORDER BY key", params)
+        return [row["key"] for row in cursor]
+
+    def get_checkpoint(self, source):
+        """Returns the last checkpoint of an interrupted import
+
+        Args:
+            source (str): Imported file
+        Returns:
+            tuple: (byte offset, entries) imported so far, None if there is no checkpoint
+        """
+        cursor = self._connection.cursor()
+        cursor.execute("SELECT offset, entries FROM ImportCheckpoints WHERE source = ?",
+                       (source,))
+        row = cursor.fetchone()
+        return None if row is None else (row["offset"], row["entries"])
+
+    def delete_checkpoint(self, source):
+        """Deletes checkpoint of a finished import
+
+        Args:
+            source (str): Imported file
+        """
+        cursor = self._connection.cursor()
+        cursor.execute("DELETE FROM ImportCheckpoints WHERE source = ?", (source,))
+        self._connection.commit()
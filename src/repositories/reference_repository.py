@@ -1,23 +1,363 @@
 """Module for saving references"""
+import os
+import re
+import gzip
+import json
+import lzma
+import sqlite3
+from itertools import islice
 from entities.reference import Reference, ReferenceType
-from constants import KEY_DOES_NOT_EXIST_ERROR, INVALID_REFERENCE_TYPE_ERROR
+from entities.reference_query import Contains, YearBetween, TypeIn, KeyStartsWith, KeyIn, \
+    TextSearch, And, Or, normalize_text
+from constants import KEY_DOES_NOT_EXIST_ERROR, INVALID_REFERENCE_TYPE_ERROR, \
+    KEY_ALREADY_EXISTS_ERROR, MISSING_FIELD_ERROR, INVALID_SEARCH_FIELD_ERROR, \
+    INVALID_ORDER_ERROR, KEY_PAGE_SIZE, EXTRA_KEYS_ERROR, EXPORT_CHUNK_SIZE, EXPORT_BUFFER_SIZE, \
+    INVALID_SHARD_FIELD_ERROR, INVALID_COMPRESSION_ERROR, QUERY_FIELDS, \
+    FUZZY_SEARCH_THRESHOLD, FUZZY_CANDIDATE_LIMIT, FUZZY_TRIGRAM_LIMIT
 from database_connection import get_database_connection
 
 
+REFERENCES_FROM_SQL = """
+    FROM Bibrefs
+    LEFT JOIN Authors ON Bibrefs.author_id = Authors.id
+    LEFT JOIN Institutions ON Bibrefs.institution_id = Institutions.id
+    LEFT JOIN Booktitles ON Bibrefs.booktitle_id = Booktitles.id
+    LEFT JOIN Editors ON Bibrefs.editor_id = Editors.id
+    LEFT JOIN Types ON Bibrefs.type_id = Types.id
+    LEFT JOIN Series ON Bibrefs.series_id = Series.id
+    LEFT JOIN Referencetypes ON Bibrefs.referencetype_id = Referencetypes.id
+"""
+
+SELECT_REFERENCES_SQL = """
+    SELECT Referencetypes.referencetype, Bibrefs.key, Bibrefs.title, Authors.author, Bibrefs.year,
+        Institutions.institution, Booktitles.booktitle, Editors.editor, Bibrefs.volume,
+        Types.type, Bibrefs.number, Series.series, Bibrefs.pages, Bibrefs.address,
+        Bibrefs.month, Bibrefs.note, Bibrefs.annote, Bibrefs.school, Bibrefs.journal
+""" + REFERENCES_FROM_SQL
+
+# Stored BibTeX text, joins are left out by SQLite when no condition uses them
+SELECT_BIBTEX_SQL = "SELECT Bibrefs.key, Bibrefs.bibtex" + REFERENCES_FROM_SQL
+
+INSERT_REFERENCE_SQL = """
+    INSERT INTO Bibrefs (
+        key, title, author_id, year, institution_id, booktitle_id, editor_id,
+        referencetype_id, volume, type_id, number, series_id, pages, address,
+        month, note, annote, school, journal, bibtex
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+UPSERT_REFERENCE_SQL = INSERT_REFERENCE_SQL + """
+    ON CONFLICT (key) DO UPDATE SET
+        title = excluded.title, author_id = excluded.author_id, year = excluded.year,
+        institution_id = excluded.institution_id, booktitle_id = excluded.booktitle_id,
+        editor_id = excluded.editor_id, referencetype_id = excluded.referencetype_id,
+        volume = excluded.volume, type_id = excluded.type_id, number = excluded.number,
+        series_id = excluded.series_id, pages = excluded.pages, address = excluded.address,
+        month = excluded.month, note = excluded.note, annote = excluded.annote,
+        school = excluded.school, journal = excluded.journal, bibtex = excluded.bibtex
+"""
+
+UPSERT_IMPORTED_SQL = """
+    INSERT INTO ImportedEntries (key, source, hash, entry_key, missing) VALUES (?, ?, ?, ?, 0)
+    ON CONFLICT (key) DO UPDATE SET
+        source = excluded.source, hash = excluded.hash, entry_key = excluded.entry_key,
+        missing = 0
+"""
+
+UPSERT_CHECKPOINT_SQL = """
+    INSERT INTO ImportCheckpoints (source, offset, entries) VALUES (?, ?, ?)
+    ON CONFLICT (source) DO UPDATE SET offset = excluded.offset, entries = excluded.entries
+"""
+
+# Normalized field -> (lookup table, column)
+LOOKUP_TABLES = {
+    "author": ("Authors", "author"),
+    "institution": ("Institutions", "institution"),
+    "booktitle": ("Booktitles", "booktitle"),
+    "editor": ("Editors", "editor"),
+    "series": ("Series", "series"),
+    "type": ("Types", "type"),
+    "referencetype": ("Referencetypes", "referencetype")
+}
+
+# Fields stored directly in Bibrefs columns of the same name
+BIBREFS_FIELD_COLUMNS = ["title", "year", "volume", "number", "pages", "address",
+                         "month", "note", "annote", "school", "journal"]
+
+# Searchable field -> column of the BibrefsSearch full-text index
+SEARCH_COLUMNS = {
+    "title": "title",
+    "author": "author",
+    "journal": "venue",
+    "booktitle": "venue",
+    "note": "note",
+    "annote": "annote"
+}
+
+BIBREFS_NOT_NULL_FIELDS = ["title", "author", "year"]
+
+# Stay below SQLite's default limit of 999 host parameters per statement
+MAX_QUERY_PARAMETERS = 500
+
+# Reference types are stored as str(ReferenceType), e.g. "ReferenceType.ARTICLE"
+# Field references can be split by when exporting -> column in SELECT_REFERENCES_SQL
+SHARD_COLUMNS = {
+    "year": "Bibrefs.year",
+    "referencetype": "Referencetypes.referencetype"
+}
+
+# Compression of exported file -> module opening compressed files
+COMPRESSION_MODULES = {
+    "gzip": gzip,
+    "xz": lzma
+}
+
+# Query field -> column in SELECT_REFERENCES_SQL
+QUERY_COLUMNS = dict(zip(QUERY_FIELDS, [
+    "Bibrefs.key", "Bibrefs.title", "Authors.author", "Bibrefs.year",
+    "Bibrefs.journal", "Booktitles.booktitle"]))
+
+REFERENCE_TYPES_BY_NAME = {str(reference_type): reference_type
+                           for reference_type in ReferenceType}
+
+
+def row_to_reference(row):
+    """Builds Reference object from a row of the joined reference query
+
+    Args:
+        row (sqlite3.Row): Row selected with SELECT_REFERENCES_SQL
+    Raises:
+        ValueError: Raises, if reference type is not supported
+    Returns:
+        Reference: Reference object
+    """
+    reference_type = REFERENCE_TYPES_BY_NAME.get(row["referencetype"])
+    if reference_type is None:
+        raise ValueError(INVALID_REFERENCE_TYPE_ERROR)
+
+    reference_fields = {field: row[field] for field in reference_type.get_keys()}
+    return Reference(reference_type, row["key"], reference_fields)
+
+
+def trigrams(text):
+    """Returns trigrams of the words of normalized text. Words are padded
+    with spaces, so that beginnings and ends of words weigh more.
+
+    Args:
+        text (str): Normalized text
+    Returns:
+        set: Three character strings
+    """
+    result = set()
+    for word in text.split():
+        padded = f"  {word} "
+        result.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return result
+
+
 class ReferenceRepository:
     """Class that interacts with database.
     """
 
-    def __init__(self):
-        """Class constructor, initializes database connection"""
-        self._connection = get_database_connection()
+    @property
+    def _connection(self):
+        """Database connection of the current thread"""
+        return get_database_connection()
+
+    def save_to_file(self, file_path, compression=None, shard=None, reference_filter=None):
+        """Save database to file in BibTeX form.
 
-    def save_to_file(self, file_path):
-        """Save database to file in BibTeX form."""
-        with open(file_path, "w", encoding="utf-8") as references_data:
-            for reference in self.load_all():
-                references_data.write(str(reference))
-                references_data.write("\n")
+        BibTeX text stored with the references is read through one cursor
+        and written a chunk of rows at a time into a large write buffer,
+        so memory use does not depend on the size of the library. The file is written under
+        a temporary name and renamed when complete, so an interrupted
+        export never replaces an existing file with a partial one.
+
+        Args:
+            file_path (str): Path of the BibTeX file
+            compression (str, optional): "gzip" or "xz" to compress the file
+            shard (tuple, optional): (field, value) to save only references
+            with the value, field is one of SHARD_COLUMNS
+            reference_filter (Condition, optional): Save only matching references, usually
+            a ReferenceFilter. Conditions SQL can not express are evaluated for loaded references.
+        Raises:
+            OSError: Raises, if the file can not be written
+            ValueError: Raises, if compression or shard field is not supported
+        Returns:
+            int: Amount of references saved
+        """
+        if compression is not None and compression not in COMPRESSION_MODULES:
+            raise ValueError(INVALID_COMPRESSION_ERROR)
+        conditions, params, residual = self._query_conditions(reference_filter)
+        if shard is not None:
+            conditions.append(f"{self._shard_column(shard[0])} = ?")
+            params.append(shard[1])
+        sql = SELECT_BIBTEX_SQL
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+
+        count = 0
+        temp_path = f"{file_path}.{os.getpid()}.tmp"
+        try:
+            with self._open_export_file(temp_path, compression) as references_data:
+                cursor = self._connection.cursor()
+                cursor.execute(f"{sql} ORDER BY Bibrefs.key", params)
+                while rows := cursor.fetchmany(EXPORT_CHUNK_SIZE):
+                    if residual:
+                        rows = [row for row in rows if all(
+                            condition.matches(self.load_one(row["key"])) for condition in residual)]
+                    references_data.write("".join(
+                        f"{row['bibtex'] or self.load_one(row['key'])}\n" for row in rows))
+                    count += len(rows)
+            os.replace(temp_path, file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return count
+
+    def query(self, reference_query):
+        """Loads references selected by a query with one SQL statement.
+        Conditions SQL can not express are evaluated for the loaded
+        references, which are then limited in memory.
+
+        Args:
+            reference_query (ReferenceQuery): Condition, order and limit
+        Returns:
+            list: Matching references
+        """
+        conditions, params, residual = self._query_conditions(reference_query.condition)
+        sql = SELECT_REFERENCES_SQL
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        order = [f"{QUERY_COLUMNS[field.removeprefix('-')]} "
+                 f"{'DESC' if field.startswith('-') else 'ASC'}"
+                 for field in reference_query.order_by]
+        sql += " ORDER BY " + ", ".join(order + ["Bibrefs.key"])
+        if reference_query.limit is not None and not residual:
+            sql += " LIMIT ?"
+            params.append(reference_query.limit)
+
+        cursor = self._connection.cursor()
+        cursor.execute(sql, params)
+        references = (row_to_reference(row) for row in cursor)
+        if residual:
+            references = (reference for reference in references
+                          if all(condition.matches(reference) for condition in residual))
+        return list(islice(references, reference_query.limit))
+
+    def _query_conditions(self, condition):
+        """Splits condition into SQL conditions and conditions
+        evaluated in memory. Parts of a top level And are split
+        separately, any other condition is compiled whole or not at all.
+
+        Args:
+            condition (Condition): Condition, None matches every reference
+        Returns:
+            tuple: SQL conditions, their parameters and remaining conditions
+        """
+        parts = condition.conditions if isinstance(condition, And) else [condition]
+        conditions, params, residual = [], [], []
+        for part in parts:
+            if part is None:
+                continue
+            compiled = self._compile_condition(part)
+            if compiled is None:
+                residual.append(part)
+            else:
+                conditions.append(compiled[0])
+                params.extend(compiled[1])
+        return conditions, params, residual
+
+    def _compile_condition(self, condition):
+        """Compiles condition into parameterized SQL
+
+        Args:
+            condition (Condition): Condition compiled
+        Returns:
+            tuple: SQL condition and list of its parameters,
+            None if SQL can not express the condition
+        """
+        compiled = None
+        match condition:
+            case Contains(field=field, text=text):
+                # Case is folded like in Contains.matches, also outside ASCII
+                compiled = f"instr(casefold({QUERY_COLUMNS[field]}), ?) > 0", [text.casefold()]
+            case YearBetween():
+                compiled = self._compile_year_between(condition)
+            case TypeIn(reference_types=reference_types):
+                compiled = ("Referencetypes.referencetype IN (SELECT value FROM json_each(?))",
+                            [json.dumps([str(reference_type)
+                                         for reference_type in reference_types])])
+            case KeyStartsWith(prefix=""):
+                compiled = "1", []
+            case KeyStartsWith(prefix=prefix):
+                # Range of keys uses the index of keys, unlike LIKE that also ignores case
+                compiled = ("Bibrefs.key >= ? AND Bibrefs.key < ?",
+                            [prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)])
+            case KeyIn(keys=keys):
+                # One JSON parameter works for any amount of keys
+                compiled = "Bibrefs.key IN (SELECT value FROM json_each(?))", [json.dumps(keys)]
+            case TextSearch(query=query):
+                match = self._match_expression(query)
+                compiled = ("Bibrefs.rowid IN (SELECT rowid FROM BibrefsSearch "
+                            "WHERE BibrefsSearch MATCH ?)", [match]) if match else ("1", [])
+            case And(conditions=parts) | Or(conditions=parts):
+                compiled = self._compile_combined(isinstance(condition, And), parts)
+        return compiled
+
+    def _compile_year_between(self, condition):
+        """Compiles YearBetween using only the given bounds, so that the year index is used"""
+        bounds = [("Bibrefs.year >= ?", condition.year_from),
+                  ("Bibrefs.year <= ?", condition.year_to)]
+        given = [(sql, year) for sql, year in bounds if year is not None]
+        if not given:
+            return "Bibrefs.year IS NOT NULL", []
+        return " AND ".join(sql for sql, _ in given), [year for _, year in given]
+
+    def _compile_combined(self, is_and, parts):
+        """Compiles And or Or condition, None if any part can not be compiled"""
+        compiled = [self._compile_condition(part) for part in parts]
+        if any(part is None for part in compiled):
+            return None
+        if not compiled:
+            return ("1" if is_and else "0"), []
+        return (f" {'AND' if is_and else 'OR'} ".join(f"({sql})" for sql, _ in compiled),
+                [param for _, part_params in compiled for param in part_params])
+
+    def _open_export_file(self, file_path, compression):
+        """Opens file for writing exported text, compressed if compression is given"""
+        if compression is None:
+            return open(file_path, "w", encoding="utf-8", buffering=EXPORT_BUFFER_SIZE)
+        return COMPRESSION_MODULES[compression].open(file_path, "wt", encoding="utf-8")
+
+    def get_shard_values(self, field):
+        """Returns values references can be split by
+
+        Args:
+            field (str): One of SHARD_COLUMNS
+        Raises:
+            ValueError: Raises, if field is not supported
+        Returns:
+            list: Distinct values of the field in ascending order
+        """
+        column = self._shard_column(field)
+        cursor = self._connection.cursor()
+        cursor.execute(f"""
+            SELECT DISTINCT {column} AS value FROM Bibrefs
+            LEFT JOIN Referencetypes ON Bibrefs.referencetype_id = Referencetypes.id
+            ORDER BY value""")
+        return [row["value"] for row in cursor]
+
+    def _shard_column(self, field):
+        """Returns column of a shard field
+
+        Raises:
+            ValueError: Raises, if field is not one of SHARD_COLUMNS
+        """
+        if field not in SHARD_COLUMNS:
+            raise ValueError(INVALID_SHARD_FIELD_ERROR)
+        return SHARD_COLUMNS[field]
 
     def save(self, reference):
         """Saves reference into database
@@ -26,102 +366,252 @@ class ReferenceRepository:
 
         Args:
             reference (Reference): Reference to be saved
+        Raises:
+            sqlite3.IntegrityError: Raises, if key already exists
         """
 
         cursor = self._connection.cursor()
+        try:
+            values = self._reference_values(cursor, reference, {})
+            cursor.execute(INSERT_REFERENCE_SQL, values)
+        except sqlite3.Error:
+            self._connection.rollback()
+            raise
 
-        sql = """INSERT INTO Authors (author) VALUES (:author) ON CONFLICT DO NOTHING"""
-        cursor.execute(sql, {"author": reference.fields["author"]})
         self._connection.commit()
 
-        if "institution" in reference.fields:
-            sql = """INSERT INTO Institutions (institution)
-                VALUES (:institution) ON CONFLICT DO NOTHING"""
-            cursor.execute(
-                sql, {"institution": reference.fields["institution"]})
-            self._connection.commit()
-
-        if "booktitle" in reference.fields:
-            sql = """INSERT INTO Booktitles (booktitle)
-                VALUES (:booktitle) ON CONFLICT DO NOTHING"""
-            cursor.execute(sql, {"booktitle": reference.fields["booktitle"]})
-            self._connection.commit()
-
-        if "editor" in reference.fields:
-            sql = """INSERT INTO Editors (editor)
-                VALUES (:editor) ON CONFLICT DO NOTHING"""
-            cursor.execute(sql, {"editor": reference.fields["editor"]})
-            self._connection.commit()
-
-        if "series" in reference.fields:
-            sql = """INSERT INTO Series (series)
-                VALUES (:series) ON CONFLICT DO NOTHING"""
-            cursor.execute(sql, {"series": reference.fields["series"]})
-            self._connection.commit()
-
-        if "type" in reference.fields:
-            sql = """INSERT INTO Types (type) VALUES (:type) ON CONFLICT DO NOTHING"""
-            cursor.execute(sql, {"type": reference.fields["type"]})
-            self._connection.commit()
-
-        sql = """INSERT INTO Referencetypes (referencetype)
-                VALUES (:referencetype) ON CONFLICT DO NOTHING"""
-        cursor.execute(sql, {"referencetype": str(reference.reference_type)})
+    def save_many(self, references, overwrite=False, *, source=None, hashes=None,
+                  entry_keys=None, checkpoint=None):
+        """Saves multiple references into database in one transaction
+
+        Entries that can not be saved are skipped and reported,
+        rest of the references are still saved.
+
+        Args:
+            references (list): List of Reference objects to be saved
+            overwrite (bool, optional): Replace fields of references whose key
+            already exists instead of reporting them
+            source (str, optional): File the references were imported from
+            hashes (list, optional): Content hash of every reference, stored with source
+            entry_keys (list, optional): Key of every reference in source, None for
+            entries without key, stored with source
+            checkpoint (tuple, optional): (byte offset, entries) of source imported
+            so far, saved in the same transaction
+        Raises:
+            sqlite3.Error: Raises, if saving fails for all references,
+            nothing is saved then
+        Returns:
+            list: (key, error) tuples for references that were not saved,
+            in the same order as given
+        """
+
+        if not references:
+            return []
+
+        cursor = self._connection.cursor()
+        existing_keys = set() if overwrite else self.get_existing_keys(
+            [reference.key for reference in references])
+        sql = UPSERT_REFERENCE_SQL if overwrite else INSERT_REFERENCE_SQL
+        lookup_ids = {}
+        failed = {}
+        rows = []
+
+        try:
+            for position, reference in enumerate(references):
+                if reference.key in existing_keys:
+                    failed[position] = ValueError(KEY_ALREADY_EXISTS_ERROR)
+                    continue
+                if any(reference.fields.get(field) is None for field in BIBREFS_NOT_NULL_FIELDS):
+                    failed[position] = ValueError(MISSING_FIELD_ERROR)
+                    continue
+                existing_keys.add(reference.key)
+                rows.append((position, self._reference_values(cursor, reference, lookup_ids)))
+
+            # Lookup rows are inserted before the savepoint, so that retrying
+            # the rows one by one keeps them
+            cursor.execute("SAVEPOINT save_many")
+            self._execute_rows(cursor, sql, rows, failed)
+
+            if source is not None:
+                cursor.executemany(UPSERT_IMPORTED_SQL, [
+                    (references[position].key, source, hashes[position], entry_keys[position])
+                    for position, _ in rows if position not in failed])
+                if checkpoint is not None:
+                    cursor.execute(UPSERT_CHECKPOINT_SQL, (source, *checkpoint))
+            cursor.execute("RELEASE save_many")
+        except sqlite3.Error:
+            self._connection.rollback()
+            raise
+
         self._connection.commit()
 
-        sql = """INSERT INTO Bibrefs (
-                    key, title, author_id, year, institution_id, booktitle_id, editor_id,
-                    referencetype_id, volume, type_id, number, series_id, pages, address,
-                    month, note, annote, school, journal
-              ) VALUES (?, ?, (SELECT id FROM Authors WHERE author = ?), ?,
-              (SELECT id FROM Institutions WHERE institution = ?),
-              (SELECT id FROM Booktitles WHERE booktitle = ?),
-              (SELECT id FROM Editors WHERE editor = ?),
-              (SELECT id FROM Referencetypes WHERE referencetype = ?), ?,
-              (SELECT id FROM Types WHERE type = ?), ?,
-              (SELECT id FROM Series WHERE series = ?), ?, ?, ?, ?, ?, ?, ?)
-            """
-        values = (
-            reference.key, reference.fields["title"],
-            reference.fields["author"], reference.fields["year"],
-            None if "institution" not in reference.fields else reference.fields["institution"],
-            None if "booktitle" not in reference.fields else reference.fields["booktitle"],
-            None if "editor" not in reference.fields else reference.fields["editor"],
-            str(reference.reference_type),
-            None if "volume" not in reference.fields else reference.fields["volume"],
-            None if "type" not in reference.fields else reference.fields["type"],
-            None if "number" not in reference.fields else reference.fields["number"],
-            None if "series" not in reference.fields else reference.fields["series"],
-            None if "pages" not in reference.fields else reference.fields["pages"],
-            None if "address" not in reference.fields else reference.fields["address"],
-            None if "month" not in reference.fields else reference.fields["month"],
-            None if "note" not in reference.fields else reference.fields["note"],
-            None if "annote" not in reference.fields else reference.fields["annote"],
-            None if "school" not in reference.fields else reference.fields["school"],
-            None if "journal" not in reference.fields else reference.fields["journal"]
+        return [(references[position].key, error) for position, error in sorted(failed.items())]
+
+    def _execute_rows(self, cursor, sql, rows, failed):
+        """Executes statement for all rows at once, or one by one if that
+        fails, so that only the failing rows are left out
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor inside savepoint save_many
+            sql (str): Statement to execute
+            rows (list): (position, values) tuples
+            failed (dict): Position -> error, failed rows are added
+        """
+        try:
+            cursor.executemany(sql, [values for _, values in rows])
+        except sqlite3.Error:
+            cursor.execute("ROLLBACK TO save_many")
+            for position, values in rows:
+                try:
+                    cursor.execute(sql, values)
+                except sqlite3.Error as error:
+                    failed[position] = error
+
+    def get_existing_keys(self, keys):
+        """Returns the given keys that are already in database
+
+        Args:
+            keys (list): Keys to be checked
+        Returns:
+            set: Keys found from database
+        """
+        cursor = self._connection.cursor()
+        keys = list(keys)
+        existing_keys = set()
+
+        for start in range(0, len(keys), MAX_QUERY_PARAMETERS):
+            chunk = keys[start:start + MAX_QUERY_PARAMETERS]
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor.execute(f"SELECT key FROM Bibrefs WHERE key IN ({placeholders})", chunk)
+            existing_keys.update(row["key"] for row in cursor)
+
+        return existing_keys
+
+    def _reference_values(self, cursor, reference, lookup_ids):
+        """Returns reference as values for INSERT_REFERENCE_SQL
+
+        Values of the normalized fields are replaced by their ids,
+        inserting new rows to the lookup tables when needed.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor of the current transaction
+            reference (Reference): Reference to be saved
+            lookup_ids (dict): Cache of already resolved (field, value) -> id pairs
+        Returns:
+            tuple: Values in the column order of Bibrefs, with rendered BibTeX text
+        """
+        fields = reference.fields
+
+        return (
+            reference.key, fields.get("title"),
+            self._get_lookup_id(cursor, "author", fields.get("author"), lookup_ids),
+            fields.get("year"),
+            self._get_lookup_id(cursor, "institution", fields.get("institution"), lookup_ids),
+            self._get_lookup_id(cursor, "booktitle", fields.get("booktitle"), lookup_ids),
+            self._get_lookup_id(cursor, "editor", fields.get("editor"), lookup_ids),
+            self._get_lookup_id(cursor, "referencetype", str(reference.reference_type),
+                                lookup_ids),
+            fields.get("volume"),
+            self._get_lookup_id(cursor, "type", fields.get("type"), lookup_ids),
+            fields.get("number"),
+            self._get_lookup_id(cursor, "series", fields.get("series"), lookup_ids),
+            fields.get("pages"), fields.get("address"), fields.get("month"),
+            fields.get("note"), fields.get("annote"), fields.get("school"),
+            fields.get("journal"), str(reference)
         )
 
-        cursor.execute(sql, values)
+    def _get_lookup_id(self, cursor, field, value, lookup_ids):
+        """Returns id of value in lookup table of field,
+        inserts value into the table if it is not there yet
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor of the current transaction
+            field (str): Normalized field, key of LOOKUP_TABLES
+            value (str): Value of the field
+            lookup_ids (dict): Cache of already resolved (field, value) -> id pairs
+        Returns:
+            int: Id of the value, None if value is None
+        """
+        if value is None:
+            return None
+        if (field, value) in lookup_ids:
+            return lookup_ids[(field, value)]
+
+        table, column = LOOKUP_TABLES[field]
+        cursor.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value, ))
+        row = cursor.fetchone()
+        if row:
+            lookup_id = row["id"]
+        else:
+            cursor.execute(f"INSERT INTO {table} ({column}) VALUES (?)", (value, ))
+            lookup_id = cursor.lastrowid
+
+        lookup_ids[(field, value)] = lookup_id
+        return lookup_id
+
+    def update_fields(self, key, changes):
+        """Updates fields of a saved reference in place with one UPDATE.
+        Lookup table ids are resolved only for the changed normalized fields
+        and the stored BibTeX text is rendered again.
+
+        Args:
+            key (str): Key of the reference
+            changes (dict): Field-value pairs to be changed
+        Raises:
+            ValueError: Raises, if key not found or the type of the reference has no field
+        Returns:
+            Reference: Updated reference
+        """
+        reference = self.load_one(key)
+        if not set(changes).issubset(reference.reference_type.get_keys()):
+            raise ValueError(EXTRA_KEYS_ERROR)
+        if not changes:
+            return reference
+
+        reference.fields.update(changes)
+        cursor = self._connection.cursor()
+        columns = ["bibtex"]
+        values = [str(reference)]
+        try:
+            for field, value in changes.items():
+                if field in BIBREFS_FIELD_COLUMNS:
+                    columns.append(field)
+                    values.append(value)
+                else:
+                    columns.append(f"{field}_id")
+                    values.append(self._get_lookup_id(cursor, field, value, {}))
+
+            assignments = ", ".join(f"{column} = ?" for column in columns)
+            cursor.execute(f"UPDATE Bibrefs SET {assignments} WHERE key = ?", (*values, key))
+            if cursor.rowcount == 0:
+                raise ValueError(KEY_DOES_NOT_EXIST_ERROR)
+        except (ValueError, sqlite3.Error):
+            self._connection.rollback()
+            raise
+
         self._connection.commit()
+        return self.load_one(key)
 
     def load_all(self):
         """Loads all references from database
 
         Returns all references from database
         """
+        return list(self.iter_all())
 
-        cursor = self._connection.cursor()
+    def iter_all(self):
+        """Yields all references from database one at a time.
 
-        sql = """select Bibrefs.key from Bibrefs"""
-        cursor.execute(sql)
-        row = cursor.fetchall()
-        if not row:
-            return []
-        references = []
-        for r in row:
-            references.append(self.load_one(r[0]))
+        All references are read with a single query through one cursor,
+        so the whole library is never held in memory at once.
 
-        return references
+        Yields:
+            Reference: Reference object
+        """
+        cursor = self._connection.cursor()
+        cursor.execute(f"{SELECT_REFERENCES_SQL} ORDER BY Bibrefs.key")
+        for row in cursor:
+            yield row_to_reference(row)
 
     def load_one(self, search_key):
         """Retrieves reference by key
@@ -135,21 +625,7 @@ class ReferenceRepository:
         """
         cursor = self._connection.cursor()
 
-        sql = """
-                SELECT Referencetypes.referencetype, Bibrefs.key, Bibrefs.title, Authors.author, Bibrefs.year,
-                    Institutions.institution, Booktitles.booktitle, Editors.editor, Bibrefs.volume, 
-                    Types.type, Bibrefs.number, Series.series, Bibrefs.pages, Bibrefs.address,
-                    Bibrefs.month, Bibrefs.note, Bibrefs.annote, Bibrefs.school, Bibrefs.journal
-                FROM Bibrefs
-                LEFT JOIN Authors ON Bibrefs.author_id = Authors.id
-                LEFT JOIN Institutions ON Bibrefs.institution_id = Institutions.id
-                LEFT JOIN Booktitles ON Bibrefs.booktitle_id = Booktitles.id
-                LEFT JOIN Editors ON Bibrefs.editor_id = Editors.id
-                LEFT JOIN Types ON Bibrefs.type_id = Types.id
-                LEFT JOIN Series ON Bibrefs.series_id = Series.id
-                LEFT JOIN Referencetypes ON Bibrefs.referencetype_id = Referencetypes.id
-                WHERE Bibrefs.key = ?
-            """
+        sql = f"{SELECT_REFERENCES_SQL} WHERE Bibrefs.key = ?"
         key = (search_key, )
         cursor.execute(sql, key)
 
@@ -157,93 +633,226 @@ class ReferenceRepository:
         if not row:
             raise ValueError(KEY_DOES_NOT_EXIST_ERROR)
 
-        if row[0] == "ReferenceType.TECHREPORT":
-            reference_fields = {
-                "title": row["title"],
-                "author": row["author"],
-                "institution": row["institution"],
-                "year": row["year"],
-                "type": row["type"],
-                "number": row["number"],
-                "address": row["address"],
-                "month": row["month"],
-                "note": row["note"],
-                "annote": row["annote"]
-            }
-            return Reference(ReferenceType.TECHREPORT, row[1], reference_fields)
-
-        if row[0] == "ReferenceType.INPROCEEDINGS":
-            reference_fields = {
-                "title": row["title"],
-                "author": row["author"],
-                "booktitle": row["booktitle"],
-                "year": row["year"],
-                "editor": row["editor"],
-                "volume": row["volume"],
-                "series": row["series"],
-                "pages": row["pages"],
-                "address": row["address"],
-                "month": row["month"],
-                "note": row["note"]
-            }
-            return Reference(ReferenceType.INPROCEEDINGS, row[1], reference_fields)
-
-        if row[0] == "ReferenceType.ARTICLE":
-            reference_fields = {
-                "title": row["title"],
-                "author": row["author"],
-                "journal": row["journal"],
-                "year": row["year"],
-                "volume": row["volume"],
-                "number": row["number"],
-                "pages": row["pages"],
-                "month": row["month"],
-                "note": row["note"]
-            }
-            return Reference(ReferenceType.ARTICLE, row[1], reference_fields)
-
-        if row[0] == "ReferenceType.PHD":
-            reference_fields = {
-                "title": row["title"],
-                "author": row["author"],
-                "school": row["school"],
-                "year": row["year"],
-                "type": row["type"],
-                "address": row["address"],
-                "month": row["month"],
-                "note": row["note"]
-            }
-            return Reference(ReferenceType.PHD, row[1], reference_fields)
+        return row_to_reference(row)
 
-        raise ValueError(INVALID_REFERENCE_TYPE_ERROR)
+    def list_keys(self, after_key=None, limit=KEY_PAGE_SIZE, order="asc"):
+        """Returns a page of reference keys in key order.
+        Pages are read with keyset pagination: the next page
+        starts after the last key of the previous one.
+
+        Args:
+            after_key (str, optional): Last key of the previous page, None for first page
+            limit (int, optional): Maximum amount of keys
+            order (str, optional): "asc" or "desc"
+        Raises:
+            ValueError: Raises, if order is not valid
+        Returns:
+            list: Keys of the page
+        """
+        if order not in ("asc", "desc"):
+            raise ValueError(INVALID_ORDER_ERROR)
+
+        cursor = self._connection.cursor()
+        comparison = ">" if order == "asc" else "<"
+        where = "" if after_key is None else f"WHERE key {comparison} :after_key"
+        sql = f"SELECT key FROM Bibrefs {where} ORDER BY key {order.upper()} LIMIT :limit"
+        cursor.execute(sql, {"after_key": after_key, "limit": limit})
+
+        return [row["key"] for row in cursor]
+
+    def search(self, query, fields=None, limit=None):
+        """Full-text search over title, author, journal/booktitle, note and annote.
+        Every word of the query is matched as a prefix and
+        results are ranked by relevance (BM25).
+
+        Args:
+            query (str): Words to search for
+            fields (list, optional): Fields to search from, defaults to all
+            limit (int, optional): Maximum amount of results, defaults to no limit
+        Raises:
+            ValueError: Raises, if field is not searchable
+        Returns:
+            list: Matching references, best match first
+        """
+        match = self._match_expression(query, fields)
+        if not match:
+            return []
+
+        cursor = self._connection.cursor()
+        sql = f"""{SELECT_REFERENCES_SQL}
+                JOIN BibrefsSearch ON BibrefsSearch.rowid = Bibrefs.rowid
+                WHERE BibrefsSearch MATCH ?
+                ORDER BY bm25(BibrefsSearch)
+                LIMIT ?
+            """
+        cursor.execute(sql, (match, -1 if limit is None else limit))
+
+        return [row_to_reference(row) for row in cursor]
+
+    def fuzzy_search(self, query, fields=None, limit=None):
+        """Fuzzy search over author and title using the trigram index.
+        Candidates containing trigrams of the query are taken from the
+        index by relevance, and scored by the share of trigrams of the
+        query found in their best field.
+
+        Args:
+            query (str): Text to search for, misspelled words are allowed
+            fields (list, optional): "author" and/or "title", defaults to both
+            limit (int, optional): Maximum amount of results, defaults to no limit
+        Raises:
+            ValueError: Raises, if field is not searchable
+        Returns:
+            list: References with score at least FUZZY_SEARCH_THRESHOLD, best match first
+        """
+        fields = fields or ["author", "title"]
+        if not all(field in ("author", "title") for field in fields):
+            raise ValueError(INVALID_SEARCH_FIELD_ERROR)
+        query_trigrams = trigrams(normalize_text(query))
+        # Trigram tokenizer matches whole trigrams inside words only
+        inner_trigrams = [trigram for trigram in query_trigrams if " " not in trigram]
+        cursor = self._connection.cursor()
+        # Rare trigrams select few candidates, common ones like "and" would select all
+        cursor.execute("""
+            SELECT term FROM BibrefsTrigramsVocab
+            WHERE term IN (SELECT value FROM json_each(?)) ORDER BY doc LIMIT ?
+            """, (json.dumps(inner_trigrams), FUZZY_TRIGRAM_LIMIT))
+        rare_trigrams = [row["term"] for row in cursor.fetchall()]
+        if not rare_trigrams:
+            return []
+
+        match = "{" + " ".join(sorted(fields)) + "} : (" + \
+            " OR ".join(f'"{trigram}"' for trigram in rare_trigrams) + ")"
+        cursor.execute("""
+            SELECT rowid, author, title FROM BibrefsTrigrams
+            WHERE BibrefsTrigrams MATCH ? ORDER BY rank LIMIT ?
+            """, (match, FUZZY_CANDIDATE_LIMIT))
+
+        scored = []
+        for row in cursor.fetchall():
+            score = max(len(query_trigrams & trigrams(normalize_text(row[field] or "")))
+                        for field in fields) / len(query_trigrams)
+            if score >= FUZZY_SEARCH_THRESHOLD:
+                scored.append((-score, row["rowid"]))
+        rowids = [rowid for _, rowid in sorted(scored)[:limit]]
+
+        cursor.execute(f"""{SELECT_REFERENCES_SQL}
+                JOIN json_each(?) AS ranked ON ranked.value = Bibrefs.rowid
+                ORDER BY ranked.key
+            """, (json.dumps(rowids),))
+        return [row_to_reference(row) for row in cursor]
+
+    def _match_expression(self, query, fields=None):
+        """Builds full-text MATCH expression matching every word as a prefix
+
+        Args:
+            query (str): Words to search for
+            fields (list, optional): Fields to search from, defaults to all
+        Raises:
+            ValueError: Raises, if field is not searchable
+        Returns:
+            str: MATCH expression, empty if query has no words
+        """
+        words = query.split()
+        if not words:
+            return ""
+
+        match = " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+        if fields:
+            if not all(field in SEARCH_COLUMNS for field in fields):
+                raise ValueError(INVALID_SEARCH_FIELD_ERROR)
+            columns = sorted(set(SEARCH_COLUMNS[field] for field in fields))
+            match = "{" + " ".join(columns) + "} : (" + match + ")"
+        return match
 
     def delete_from_db(self, search_key):
         """Deletes reference from database by key"""
+        self.delete_many([search_key])
+
+    def delete_many(self, keys):
+        """Deletes references from database by keys in one transaction
 
+        Args:
+            keys (list): Keys of references to be deleted
+        Returns:
+            int: Amount of deleted references
+        """
         cursor = self._connection.cursor()
+        keys = list(keys)
+        deleted = 0
+
+        try:
+            for start in range(0, len(keys), MAX_QUERY_PARAMETERS):
+                chunk = keys[start:start + MAX_QUERY_PARAMETERS]
+                placeholders = ", ".join("?" for _ in chunk)
+                cursor.execute(f"DELETE FROM Bibrefs WHERE key IN ({placeholders})", chunk)
+                deleted += cursor.rowcount
+        except sqlite3.Error:
+            self._connection.rollback()
+            raise
 
-        sql = "DELETE FROM Bibrefs WHERE key = ?"
-        key = (search_key, )
-        cursor.execute(sql, key)
+        self._connection.commit()
+        return deleted
+
+    def compact(self):
+        """Deletes lookup table rows no reference uses anymore,
+        updates query planner statistics and returns free pages
+        to the file system (when database uses incremental auto vacuum)
+
+        Returns:
+            int: Amount of deleted lookup table rows
+        """
+        cursor = self._connection.cursor()
+        deleted = 0
 
+        for field, (table, _) in LOOKUP_TABLES.items():
+            sql = f"""DELETE FROM {table} WHERE NOT EXISTS (
+                    SELECT 1 FROM Bibrefs WHERE Bibrefs.{field}_id = {table}.id)"""
+            cursor.execute(sql)
+            deleted += cursor.rowcount
         self._connection.commit()
 
-    def get_similar_key_count(self, key: str) -> int:
-        """Returns key substring occurrences in self._references
+        cursor.execute("ANALYZE")
+        cursor.execute("PRAGMA incremental_vacuum").fetchall()
+        self._connection.commit()
+
+        return deleted
+
+    def get_free_key(self, stem: str, reserved_keys=None) -> str:
+        """Returns stem if no reference has it as key yet,
+        otherwise stem with the next free _N suffix.
+        Existing keys are found with an index range query on the key.
+
         Args:
-            key (str): Key to be searched
+            stem (str): Key to be used as base
+            reserved_keys (set, optional): Keys not in database yet which can not be used,
+            e.g. keys generated earlier in the same import
         Returns:
-            int: Amount of similar keys
+            str: Unused key
         """
-        return sum(key in reference.key for reference in self.load_all())
+        reserved_keys = reserved_keys or set()
+        cursor = self._connection.cursor()
+        # "`" is the character after "_", so the range covers stem and stem_N
+        cursor.execute("SELECT key FROM Bibrefs WHERE key >= ? AND key < ?",
+                       (stem, stem + "`"))
+        suffix_pattern = re.compile(re.escape(stem) + r"(?:_(\d+))?")
+        suffixes = [suffix_pattern.fullmatch(row["key"]) for row in cursor]
+        suffixes = [int(match.group(1) or 0) for match in suffixes if match]
+
+        if not suffixes and stem not in reserved_keys:
+            return stem
+
+        suffix = max(suffixes, default=0) + 1
+        while f"{stem}_{suffix}" in reserved_keys:
+            suffix += 1
+        return f"{stem}_{suffix}"
 
     def empty_all_tables(self):
         """Deletes all rows from all database tables
         """
 
         cursor = self._connection.cursor()
-        tables = ["Bibrefs", "Authors", "Institutions", "Booktitles",
-                  "Editors", "Series", "Types", "Referencetypes"]
+        tables = ["ImportCheckpoints", "ImportedEntries", "Bibrefs", "Authors",
+                  "Institutions", "Booktitles", "Editors", "Series", "Types", "Referencetypes"]
         sql = "DELETE FROM"
         for table in tables:
             cursor.execute(f"{sql} {table}")
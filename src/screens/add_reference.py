@@ -114,19 +114,19 @@ class ReferenceForm(Screen[dict]):
 
     # Button actions
 
-    def on_button_pressed(self, event: Button.Pressed):
+    async def on_button_pressed(self, event: Button.Pressed):
         """Button press calls approiate function"""
         if event.button.id == "save":
-            self.action_save()
+            await self.action_save()
         elif event.button.id == "cancel":
             self.action_cancel()
 
-    def on_key(self, key: Key):
+    async def on_key(self, key: Key):
         """Tracks if Enter button presses happen on focused
         button"""
         if key.key in ["enter", "ctrl+j"]:
             if self.save_button.has_focus:
-                self.action_save()
+                await self.action_save()
             elif self.cancel_button.has_focus:
                 self.action_cancel()
 
@@ -134,11 +134,11 @@ class ReferenceForm(Screen[dict]):
         """Closes the screen, triggered by key"""
         self.app.pop_screen()
 
-    def action_save(self):
+    async def action_save(self):
         """Trys to create reference."""
         try:
-            key = self.app.reference_services.create_reference(self.reference_type,
-                                                               self.new_reference)
+            key = await self.app.async_services.create_reference(self.reference_type,
+                                                                 self.new_reference)
             self.app.notify(f"Reference created: {key}")
             self.dismiss()
         except ValueError as error:
@@ -0,0 +1,39 @@
+""" Module containing GUI import progress screen
+
+    Yields:
+        Screen: Textual widget
+    """
+
+from textual.app import ComposeResult
+from textual.screen import ModalScreen
+from textual.widgets import Label, ProgressBar
+from textual.containers import Grid
+
+
+class ImportProgress(ModalScreen[bool]):
+    """Screen shows progress of a BibTeX import
+    """
+
+    def __init__(self, file_name) -> None:
+        super().__init__()
+        self.file_name = file_name
+        self.status = Label(f"Importing {file_name}", id="question")
+        self.progress_bar = ProgressBar(show_eta=False)
+
+    def compose(self) -> ComposeResult:
+        yield Grid(
+            self.status,
+            self.progress_bar,
+            id="progress"
+        )
+
+    def update_progress(self, entries, offset, size):
+        """Shows amount of entries and bytes imported so far
+
+        Args:
+            entries (int): Entries read from the file
+            offset (int): Bytes read from the file
+            size (int): Size of the file in bytes
+        """
+        self.progress_bar.update(total=size, progress=offset)
+        self.status.update(f"Importing {self.file_name}: {entries} entries")
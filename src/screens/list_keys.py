@@ -19,55 +19,86 @@ from textual.events import Key
 from textual.message import Message
 from entities.reference import Reference
 from screens.confirmation_screen import ConfirmationScreen
+from constants import KEY_PAGE_SIZE, KEY_PAGE_PRELOAD
 
 
 class ListKeys(Screen[None]):
     """Screen that lists all references in an optionlist
-    showing reference keys
+    showing reference keys. Keys are fetched a page at a time
+    when the user scrolls down, and a reference is loaded only
+    when it is opened.
 
     Args:
         Screen (Screen): Textual Screen component
+        keys (list): First page of keys
+        list_keys, load_reference: Awaitable repository methods
     """
 
-    def __init__(self, references: list[Reference], delete_reference, create_reference) -> None:
+    def __init__(self, keys: list[str], list_keys, load_reference,
+                 delete_reference, create_reference) -> None:
         super().__init__()
         self.sub_title = "List by key"
-        self.references = references
-        self.option_items = [Option(ref.key, id=ref.key)
-                             for ref in references]
+        self.keys = keys
+        self.list_keys = list_keys
+        self.load_reference = load_reference
         self.delete_reference = delete_reference
         self.create_reference = create_reference
-        self.option_id = 0
+        self.last_key = keys[-1] if keys else None
+        self.all_keys_loaded = len(keys) < KEY_PAGE_SIZE
 
     BINDINGS = [("escape", "back", "Back"),
                 ("enter, ctrl+j, ctrl+m", "open_option", "Open", )]
 
-    def on_key(self, event: Key):
+    async def on_key(self, event: Key):
         """Pass"""
         if event.key == "enter":
-            self.action_open_option()
+            await self.action_open_option()
 
     def compose(self) -> ComposeResult:
+        options = [Option(key, id=key) for key in self.keys]
         yield Header()
-        yield Center(OptionList(*self.option_items, id="optionList"))
+        yield Center(OptionList(*options, id="optionList"))
         yield Footer()
 
+    async def load_next_page(self):
+        """Adds next page of keys to the end of the option list"""
+        if self.all_keys_loaded:
+            return
+
+        keys = await self.list_keys(self.last_key, KEY_PAGE_SIZE)
+        if len(keys) < KEY_PAGE_SIZE:
+            self.all_keys_loaded = True
+        if keys:
+            self.last_key = keys[-1]
+            self.query_one(OptionList).add_options([Option(key, id=key) for key in keys])
+
     @on(OptionList.OptionMessage)
-    def user_selected(self, event: OptionList.OptionSelected):
-        """Identifies id for current option selected
-        by user
+    async def user_selected(self, event: OptionList.OptionSelected):
+        """Loads more keys when user gets near the
+        end of the keys loaded so far
 
         Args:
             event (OptionList.OptionSelected): Textual message
         """
-        self.option_id = event.option_index
+        if event.option_index >= event.option_list.option_count - KEY_PAGE_PRELOAD:
+            await self.load_next_page()
+
+    async def on_mouse_scroll_down(self) -> None:
+        """Loads more keys when scrolled to the end of the option list"""
+        option_list = self.query_one(OptionList)
+        if option_list.scroll_y >= option_list.max_scroll_y:
+            await self.load_next_page()
 
-    def action_open_option(self):
+    async def action_open_option(self):
         """Opens new screen from selected option,
         triggered by key stroke
         """
+        option_list = self.query_one(OptionList)
+        if option_list.highlighted is None:
+            return
 
-        self.app.switch_screen(SingleReference(self.references[self.option_id]))
+        key = option_list.get_option_at_index(option_list.highlighted).id
+        self.app.switch_screen(SingleReference(await self.load_reference(key)))
 
     def action_back(self):
         """Closes screen, triggered by keystroke"""
@@ -102,10 +133,10 @@ class SingleReference(Screen[None]):
         """Calls for deletion of current
         reference from DB"""
 
-        def confirm(confirmation):
+        async def confirm(confirmation):
             if confirmation:
                 try:
-                    self.app.reference_services.delete_reference(self.reference.key)
+                    await self.app.async_services.delete_reference(self.reference.key)
                     self.app.notify(f"{self.reference.key} succesfully removed from DB")
                     self.app.pop_screen()
                 except sqlite3.Error:
@@ -191,18 +222,14 @@ class SingleReferenceWidget(Widget):
         self.modify_field = None
 
     @on(ModifyField)
-    def field_modified(self):
+    async def field_modified(self):
         """Catch message from modify field."""
         table = self.query_one(DataTable)
         if self.modify_field is not None:
             field = self.query_one(TextArea)
             try:
-                self.app.reference_services.validate_field(self.modify_field[1], field.text)
-
-                self.reference.fields[self.modify_field[1]] = field.text
-                self.app.reference_repository.delete_from_db(self.reference.key)
-                self.app.reference_repository.save(self.reference)
-
+                self.reference = await self.app.async_services.update_reference(
+                    self.reference.key, {self.modify_field[1]: field.text})
 
                 self.app.switch_screen(SingleReference(self.reference, table.cursor_coordinate))
             except ValueError as error:
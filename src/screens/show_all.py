@@ -12,6 +12,7 @@ from textual.widgets import Header, Footer
 from textual.screen import Screen
 from textual.containers import Center, VerticalScroll
 from textual.widgets import RadioSet, RadioButton, Input, Markdown
+from constants import SEARCH_RESULT_LIMIT
 
 
 class ShowAll(Screen[None]):
@@ -22,6 +23,8 @@ class ShowAll(Screen[None]):
         super().__init__(classes="showall")
         self.sub_title = "Show all references"
         self.references = references
+        # Replaced by a NumPy snapshot when it has been created, if NumPy is installed
+        self.searchable = references
         self.ref_services = ref_services
         self.border = True
         self.index = 0
@@ -37,6 +40,7 @@ class ShowAll(Screen[None]):
                 yield RadioButton("Author", value= True)
                 yield RadioButton("Year")
                 yield RadioButton("Title")
+                yield RadioButton("Fuzzy")
         with VerticalScroll(id="results-container"):
             yield Center(Markdown(id="results"))
         yield Footer()
@@ -46,25 +50,51 @@ class ShowAll(Screen[None]):
         """Called when app starts."""
         radioset = self.query_one(RadioSet)
         radioset.border_title = "Filter by:"
-        radioset.border_subtitle = "Results:"
-        markdown = self.make_data_string(self.references)
-        self.query_one("#results", Markdown).update(markdown)
+        self.show_results(self.references)
+        self.create_snapshot()
+
+
+    @work
+    async def create_snapshot(self) -> None:
+        """Creates snapshot used for filtering outside the event loop"""
+        self.searchable = await self.ref_services.create_snapshot(self.references)
 
 
     def on_radio_set_changed(self, event: RadioSet.Changed) -> None:
         """Takes care of radio index change"""
         self.index = event.radio_set.pressed_index
         search = self.query_one('#input', Input)
-        self.lookup_references(search.value)
+        self.filter_results(search.value)
 
 
     async def on_input_changed(self, message: Input.Changed) -> None:
         """A coroutine to handle a text changed message."""
-        if message.value:
-            self.lookup_references(message.value)
+        self.filter_results(message.value)
+
+
+    def filter_results(self, word: str) -> None:
+        """Shows references matching user input, all of them if input is empty
+
+        Args:
+            word (str): user input
+        """
+        if word:
+            self.lookup_references(word)
         else:
-            markdown = self.make_data_string(self.references)
-            self.query_one("#results", Markdown).update(markdown)
+            self.show_results(self.references)
+
+
+    def show_results(self, references: list, limited=False) -> None:
+        """Shows references and their amount
+
+        Args:
+            references (list): references to be shown
+            limited (bool, optional): results were cut to SEARCH_RESULT_LIMIT
+        """
+        radioset = self.query_one(RadioSet)
+        radioset.border_subtitle = f"Results: {len(references)}" + \
+            (f" (first {SEARCH_RESULT_LIMIT} shown)" if limited else "")
+        self.query_one("#results", Markdown).update(self.make_data_string(references))
 
 
     @work(exclusive=True)
@@ -74,9 +104,9 @@ class ShowAll(Screen[None]):
         Args:
             word (str): user input
         """
-        temp_ref = self.ref_services.filter_references(self.references, self.index, word)
-        markdown =  self.make_data_string(temp_ref)
-        self.query_one("#results", Markdown).update(markdown)
+        temp_ref = await self.ref_services.search_references(self.searchable, self.index, word)
+        # Searches other than year return at most SEARCH_RESULT_LIMIT best matches
+        self.show_results(temp_ref, self.index != 1 and len(temp_ref) >= SEARCH_RESULT_LIMIT)
 
 
     def make_data_string(self, temp_ref: list):
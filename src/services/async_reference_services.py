@@ -0,0 +1,107 @@
+"""Module consisting of asynchronous facade for reference services """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from repositories.reference_repository import ReferenceRepository
+from services.reference_services import ReferenceServices, DuplicatePolicy
+from services.reference_snapshot import create_snapshot
+from constants import DATABASE_WORKERS, KEY_PAGE_SIZE, IMPORT_WORKERS
+
+
+class AsyncReferenceServices:
+    """Awaitable versions of repository and service methods.
+    Calls are run on a dedicated thread pool, so database work
+    never blocks the asyncio event loop of the GUI. Every thread
+    of the pool uses its own database connection.
+
+    Attributes:
+      _reference_repository: Reference repository object
+      _reference_services: Reference services object
+      _executor: Thread pool running the calls
+    """
+
+    def __init__(self, reference_repository: ReferenceRepository,
+                 reference_services: ReferenceServices) -> None:
+        self._reference_repository = reference_repository
+        self._reference_services = reference_services
+        self._executor = ThreadPoolExecutor(max_workers=DATABASE_WORKERS,
+                                            thread_name_prefix="database")
+
+    async def _run(self, function, *args, **kwargs):
+        """Runs function in the executor and returns its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(function, *args, **kwargs))
+
+    async def load_all(self):
+        """Awaitable ReferenceRepository.load_all"""
+        return await self._run(self._reference_repository.load_all)
+
+    async def load_one(self, search_key):
+        """Awaitable ReferenceRepository.load_one"""
+        return await self._run(self._reference_repository.load_one, search_key)
+
+    async def list_keys(self, after_key=None, limit=KEY_PAGE_SIZE, order="asc"):
+        """Awaitable ReferenceRepository.list_keys"""
+        return await self._run(self._reference_repository.list_keys, after_key, limit, order)
+
+    async def search(self, query, fields=None, limit=None):
+        """Awaitable ReferenceRepository.search"""
+        return await self._run(self._reference_repository.search, query, fields, limit)
+
+    async def query(self, reference_query):
+        """Awaitable ReferenceRepository.query"""
+        return await self._run(self._reference_repository.query, reference_query)
+
+    async def save_many(self, references):
+        """Awaitable ReferenceRepository.save_many"""
+        return await self._run(self._reference_repository.save_many, references)
+
+    async def save_to_file(self, file_path, reference_filter=None):
+        """Awaitable ReferenceRepository.save_to_file"""
+        return await self._run(self._reference_repository.save_to_file, file_path,
+                               reference_filter=reference_filter)
+
+    async def create_reference(self, reference_type, reference, manual_key=None):
+        """Awaitable ReferenceServices.create_reference"""
+        return await self._run(self._reference_services.create_reference,
+                               reference_type, reference, manual_key)
+
+    async def update_reference(self, reference_key, changes):
+        """Awaitable ReferenceServices.update_reference"""
+        return await self._run(self._reference_services.update_reference,
+                               reference_key, changes)
+
+    async def delete_reference(self, reference_key):
+        """Awaitable ReferenceServices.delete_reference"""
+        return await self._run(self._reference_services.delete_reference, reference_key)
+
+    async def add_from_file(self, file_path, *, workers=IMPORT_WORKERS,
+                            on_duplicate=DuplicatePolicy.SKIP, flag_missing=False,
+                            resume=False, progress=None):
+        """Awaitable ReferenceServices.add_from_file.
+        Progress callback is called from a database thread."""
+        return await self._run(self._reference_services.add_from_file, file_path,
+                               workers=workers, on_duplicate=on_duplicate,
+                               flag_missing=flag_missing, resume=resume, progress=progress)
+
+    async def add_from_files(self, pattern, *, workers=IMPORT_WORKERS,
+                             on_duplicate=DuplicatePolicy.SKIP, flag_missing=False,
+                             resume=False, progress=None):
+        """Awaitable ReferenceServices.add_from_files.
+        Progress callback is called from a database thread."""
+        return await self._run(self._reference_services.add_from_files, pattern,
+                               workers=workers, on_duplicate=on_duplicate,
+                               flag_missing=flag_missing, resume=resume, progress=progress)
+
+    async def search_references(self, references, option, arg):
+        """Awaitable ReferenceServices.search_references"""
+        return await self._run(self._reference_services.search_references,
+                               references, option, arg)
+
+    async def create_snapshot(self, references):
+        """Awaitable create_snapshot"""
+        return await self._run(create_snapshot, references)
+
+    def shutdown(self):
+        """Stops the executor after running calls have finished"""
+        self._executor.shutdown(wait=True)
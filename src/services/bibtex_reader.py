@@ -0,0 +1,127 @@
+"""Module for reading large BibTeX files a batch of entries at a time"""
+import os
+import re
+import glob
+import bibtexparser
+
+# Line starting a BibTeX block, e.g. "@article{" or "@string ("
+BLOCK_START = re.compile(r"\s*@\s*(\w+)\s*([{(])")
+# Key of an entry after its opening brace or parenthesis
+ENTRY_KEY = re.compile(r"\s*@\s*\w+\s*[{(]\s*([^,\s]+)\s*,")
+# Block types that are not references
+NON_ENTRY_TYPES = set(["string", "comment", "preamble"])
+
+
+def iter_blocks(file_obj):
+    """Splits BibTeX file into blocks at entry boundaries
+    without parsing the entries. The file is read line by line,
+    so only one block is held in memory at a time.
+
+    Args:
+        file_obj: File opened in binary mode, read from its start
+    Yields:
+        tuple: (block type in lower case, block text, byte offset after the block)
+    """
+    offset = 0
+    block_type = None
+    lines = []
+    depth = 0
+    opening, closing = "{", "}"
+
+    for raw_line in file_obj:
+        offset += len(raw_line)
+        line = raw_line.decode("utf-8")
+
+        if depth == 0:
+            match = BLOCK_START.match(line)
+            if not match:
+                continue
+            block_type = match.group(1).lower()
+            opening, closing = ("{", "}") if match.group(2) == "{" else ("(", ")")
+            lines = []
+
+        lines.append(line)
+        depth += line.count(opening) - line.count(closing)
+
+        if depth <= 0:
+            depth = 0
+            yield block_type, "".join(lines), offset
+
+    # Unterminated block at the end of file is left for the parser to report
+    if depth > 0:
+        yield block_type, "".join(lines), offset
+
+
+def iter_batches(file_obj, batch_size, start_offset=0):
+    """Groups blocks of BibTeX file into batches of entries.
+    Every batch starts with all @string definitions read so far,
+    so that it can be parsed on its own.
+
+    Args:
+        file_obj: File opened in binary mode
+        batch_size (int): Maximum amount of entries in a batch
+        start_offset (int, optional): Byte offset of the first entry, must be
+        a block boundary. @string definitions before it are still read.
+    Yields:
+        tuple: (batch text, amount of entries, byte offset after the batch)
+    """
+    strings = []
+    entries = []
+    offset = 0
+
+    for block_type, text, offset in iter_blocks(file_obj):
+        if block_type == "string":
+            strings.append(text)
+        elif block_type not in NON_ENTRY_TYPES and offset > start_offset:
+            entries.append(text)
+
+        if len(entries) >= batch_size:
+            yield "".join(strings + entries), len(entries), offset
+            entries = []
+
+    if entries:
+        yield "".join(strings + entries), len(entries), offset
+
+
+def read_keys(file_obj, end_offset):
+    """Reads keys of the entries before an offset without parsing them
+
+    Args:
+        file_obj: File opened in binary mode
+        end_offset (int): Byte offset of a block boundary to stop at
+    Returns:
+        set: Keys of the entries, entries without key are left out
+    """
+    keys = set()
+    for block_type, text, offset in iter_blocks(file_obj):
+        if offset > end_offset:
+            break
+        match = ENTRY_KEY.match(text)
+        if block_type not in NON_ENTRY_TYPES and match:
+            keys.add(match.group(1))
+    return keys
+
+
+def parse_batch(batch_text):
+    """Parses batch of BibTeX entries
+
+    Args:
+        batch_text (str): BibTeX text
+    Returns:
+        list: Entries as dictionaries with ENTRYTYPE and ID keys,
+        in the order they appear in the text
+    """
+    return bibtexparser.loads(batch_text).entries
+
+
+def find_bibtex_files(pattern):
+    """Finds BibTeX files to be imported
+
+    Args:
+        pattern (str): Directory searched recursively for .bib files or glob pattern
+    Returns:
+        list: Paths of the files in alphabetical order
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "**", "*.bib")
+    return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
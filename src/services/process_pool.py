@@ -0,0 +1,16 @@
+"""Module for worker process pools of imports and exports"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+
+def create_process_pool(workers):
+    """Returns executor running calls in new worker processes.
+    Workers are started with spawn, as forking a process that runs
+    GUI and database threads is not safe.
+
+    Args:
+        workers (int): Amount of processes
+    Returns:
+        ProcessPoolExecutor: Executor to be used as a context manager
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
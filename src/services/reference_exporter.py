@@ -0,0 +1,98 @@
+"""Module for exporting references split into many BibTeX files"""
+import os
+import json
+import hashlib
+from repositories.reference_repository import ReferenceRepository, REFERENCE_TYPES_BY_NAME
+from services.process_pool import create_process_pool
+from constants import INVALID_COMPRESSION_ERROR
+
+MANIFEST_FILE_NAME = "manifest.json"
+# Compression -> extension added after .bib
+COMPRESSION_EXTENSIONS = {None: "", "gzip": ".gz", "xz": ".xz"}
+CHECKSUM_BLOCK_SIZE = 1024 * 1024
+
+
+def shard_file_name(field, value, compression=None):
+    """Returns file name of a shard
+
+    Args:
+        field (str): Field references are split by
+        value: Value of the field in the shard
+        compression (str, optional): Compression of the file
+    Returns:
+        str: File name, e.g. 2023.bib.gz or article.bib
+    """
+    if field == "referencetype":
+        value = REFERENCE_TYPES_BY_NAME[value].value
+    return f"{value}.bib{COMPRESSION_EXTENSIONS[compression]}"
+
+
+def file_checksum(file_path):
+    """Returns SHA-256 checksum of a file
+
+    Args:
+        file_path (str): Path of the file
+    Returns:
+        str: Hexadecimal digest
+    """
+    checksum = hashlib.sha256()
+    with open(file_path, "rb") as shard_file:
+        while block := shard_file.read(CHECKSUM_BLOCK_SIZE):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
+def export_shard(shard):
+    """Saves one shard and computes its checksum. Uses a database
+    connection of its own, so it can be run in a worker process.
+
+    Args:
+        shard (tuple): (file path, field, value, compression)
+    Returns:
+        tuple: (amount of references, checksum of the file)
+    """
+    file_path, field, value, compression = shard
+    count = ReferenceRepository().save_to_file(file_path, compression, (field, value))
+    return count, file_checksum(file_path)
+
+
+def export_shards(directory, field="year", compression=None, workers=1):
+    """Saves references into one BibTeX file for each value of a field
+    and writes a manifest listing the files with their amount of
+    references and checksums. With more than one worker, shards are
+    rendered, compressed and written by parallel processes.
+
+    Args:
+        directory (str): Existing directory the files are saved in
+        field (str, optional): "year" or "referencetype"
+        compression (str, optional): "gzip" or "xz" to compress the files
+        workers (int, optional): Amount of processes saving shards
+    Raises:
+        ValueError: Raises, if field or compression is not supported
+    Returns:
+        dict: Contents of the manifest
+    """
+    if compression not in COMPRESSION_EXTENSIONS:
+        raise ValueError(INVALID_COMPRESSION_ERROR)
+    values = ReferenceRepository().get_shard_values(field)
+    file_names = [shard_file_name(field, value, compression) for value in values]
+    shards = [(os.path.join(directory, file_name), field, value, compression)
+              for file_name, value in zip(file_names, values)]
+
+    if workers > 1:
+        with create_process_pool(workers) as executor:
+            results = list(executor.map(export_shard, shards))
+    else:
+        results = [export_shard(shard) for shard in shards]
+
+    manifest = {
+        "field": field,
+        "compression": compression,
+        "entries": sum(count for count, _ in results),
+        "files": [{"file": file_name, "value": value, "entries": count, "sha256": checksum}
+                  for file_name, value, (count, checksum) in zip(file_names, values, results)]
+    }
+    with open(os.path.join(directory, MANIFEST_FILE_NAME), "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+
+    return manifest
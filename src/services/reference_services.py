@@ -1,25 +1,239 @@
 """Module consisting on Reference Serices class """
+import os
 import re
-from sqlite3 import IntegrityError
-import bibtexparser
+import hashlib
+from collections import deque
+from enum import Enum
 from repositories.reference_repository import ReferenceRepository
+from repositories.import_repository import ImportRepository
+from services.bibtex_reader import iter_batches, parse_batch, find_bibtex_files, read_keys
+from services.process_pool import create_process_pool
+from services.reference_snapshot import ReferenceSnapshot
+from services.reference_validator import validate_batch, validate_field, validate_reference
 from entities.reference import Reference, ReferenceType
-from constants import MISSING_FIELD_ERROR, YEAR_FORMAT_ERROR, MONTH_FORMAT_ERROR, \
-    VOLUME_FORMAT_ERROR, PAGES_FORMAT_ERROR, EXTRA_KEYS_ERROR, KEY_ALREADY_EXISTS_ERROR
+from constants import KEY_ALREADY_EXISTS_ERROR, SEARCH_RESULT_LIMIT, IMPORT_BATCH_SIZE
+
+
+class DuplicatePolicy(Enum):
+    """What to do when an imported entry has a key
+    that is already in the database"""
+    SKIP = "skip"
+    OVERWRITE = "overwrite"
+    RENAME = "rename"
+
+
+def hash_entry(entry):
+    """Returns hash of parsed BibTeX entry that does not
+    depend on field order or formatting of the file
+
+    Args:
+        entry (dict): Entry with ENTRYTYPE and ID keys
+    Returns:
+        str: Hexadecimal SHA-1 digest
+    """
+    content = "\n".join(f"{field}={value}" for field, value in sorted(entry.items()))
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def prepare_batch(batch_text):
+    """Parses, hashes and validates a batch of BibTeX entries.
+    Does not use the database, so it can be run in a worker process.
+
+    Args:
+        batch_text (str): BibTeX text of the batch
+    Returns:
+        list: (reference type, key, fields, error, hash) tuples in file order,
+        key is None when entry has no key and error None for valid entries,
+        otherwise error lists every problem of the entry
+    """
+    entries = []
+    for entry in parse_batch(batch_text):
+        entry_hash = hash_entry(entry)
+        # value after the @ symbol in bibtex
+        ref_type_literal = entry.pop("ENTRYTYPE")
+        ref_key = entry.pop("ID") or None
+
+        # Don't load unsupported reference types
+        if ref_type_literal not in ReferenceType.get_literals():
+            continue
+
+        entries.append((ReferenceType(ref_type_literal), ref_key, entry, entry_hash))
+
+    errors = validate_batch([(ref_type, fields) for ref_type, _, fields, _ in entries])
+    return [(ref_type, ref_key, fields,
+             ValueError("; ".join(entry_errors)) if entry_errors else None, entry_hash)
+            for (ref_type, ref_key, fields, entry_hash), entry_errors in zip(entries, errors)]
+
+
+def prepare_located_batch(batch):
+    """prepare_batch for batches of iter_source_batches
+
+    Args:
+        batch (tuple): Batch text followed by values locating the batch
+    Returns:
+        tuple: Prepared entries followed by the values locating the batch
+    """
+    batch_text, *location = batch
+    return prepare_batch(batch_text), *location
+
+
+def iter_source_batches(sources, batch_size):
+    """Reads batches of files one file at a time,
+    each file from the start offset of its import
+
+    Args:
+        sources (list): ImportedSource objects
+        batch_size (int): Maximum amount of entries in a batch
+    Yields:
+        tuple: (batch text, amount of entries, byte offset after the batch, index of file)
+    """
+    for index, imported in enumerate(sources):
+        with open(imported.path, "rb") as references_data:
+            for batch in iter_batches(references_data, batch_size, imported.start_offset):
+                yield *batch, index
+
+
+def prepare_batches(batches, workers):
+    """Runs prepare_located_batch for batches, in parallel
+    processes when there is more than one worker
+
+    Args:
+        batches (iterable): Batches of iter_batches
+        workers (int): Amount of processes
+    Yields:
+        Results of prepare_located_batch in the order of batches
+    """
+    if workers > 1:
+        with create_process_pool(workers) as executor:
+            yield from map_in_order(executor, prepare_located_batch, batches, workers * 2)
+    else:
+        yield from map(prepare_located_batch, batches)
+
+
+def map_in_order(executor, function, iterable, max_pending):
+    """Like executor.map, but submits new calls only when
+    less than max_pending results are waiting, so the
+    iterable is not read ahead into memory
+
+    Yields:
+        Results of function calls in the order of iterable
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class ImportedSource:
+    """References imported earlier from one file and
+    the ones found again while importing it.
+    Keys and hashes are kept for every entry of the file.
+
+    Attributes:
+        path (str): Absolute path of the file
+        entries (dict): Key -> (hash, missing, entry key) of earlier imported references
+        found_keys (set): Keys of earlier imported references found from the file
+        seen_keys (set): Keys used so far in this import of the file, including
+        the entries before the checkpoint, so later copies of a key are duplicates
+        size (int): Size of the file in bytes
+        start_offset (int): Byte offset the import started from
+        offset (int): Byte offset imported so far
+        entry_count (int): Entries imported so far
+    """
+
+    def __init__(self, path, entries, checkpoint=None):
+        self.path = path
+        self.entries = entries
+        self.found_keys = set()
+        self.size = os.path.getsize(path)
+        if checkpoint is not None and checkpoint[0] > self.size:
+            # File has been replaced with a shorter one since the checkpoint
+            checkpoint = None
+        self.start_offset, self.entry_count = checkpoint or (0, 0)
+        self.offset = self.start_offset
+        self.seen_keys = set()
+        if self.start_offset:
+            with open(path, "rb") as file_obj:
+                self.seen_keys = read_keys(file_obj, self.start_offset)
+        self._keys_by_hash = {}
+        # Key in the file -> key the entry was saved with, differs for renamed entries
+        self._saved_keys = {}
+        for key, (entry_hash, _, entry_key) in entries.items():
+            self._keys_by_hash.setdefault(entry_hash, []).append(key)
+            if entry_key is not None:
+                self._saved_keys[entry_key] = key
+
+    def find_unchanged(self, ref_key, entry_hash):
+        """Marks entry found and tells if it is unchanged since last import.
+        Entries without key are recognized by their hash only.
+
+        Args:
+            ref_key (str): Key of the entry, None if it has no key
+            entry_hash (str): Hash of the entry
+        Returns:
+            str: Key of the unchanged reference, None if entry is new or changed
+        """
+        if ref_key is None:
+            for key in self._keys_by_hash.get(entry_hash, []):
+                if key not in self.found_keys:
+                    self.found_keys.add(key)
+                    return key
+            return None
+
+        saved_key = self._saved_keys.get(ref_key)
+        if saved_key is None:
+            return None
+        self.found_keys.add(saved_key)
+        return saved_key if self.entries[saved_key][0] == entry_hash else None
+
+    def saved_key(self, ref_key):
+        """Returns key an entry was saved with when the file was imported earlier,
+        or the key itself for new entries
+
+        Args:
+            ref_key (str): Key of the entry in the file
+        Returns:
+            str: Key of the reference in database
+        """
+        return self._saved_keys.get(ref_key, ref_key)
+
+    def advance(self, count, offset):
+        """Moves past a batch of entries
+
+        Args:
+            count (int): Amount of entries in the batch
+            offset (int): Byte offset after the batch
+        Returns:
+            tuple: Checkpoint (byte offset, entries) after the batch
+        """
+        self.offset = offset
+        self.entry_count += count
+        return self.offset, self.entry_count
+
+    def is_changed(self, ref_key):
+        """Tells if key belongs to a reference imported earlier from the file.
+        Unchanged entries are skipped before, so the rest have changed."""
+        return ref_key in self.entries
 
 
 class ReferenceServices:
     """Services for references
     Attributes:
       _refence_repository: Reference repository object
+      _import_repository: Import bookkeeping repository object
 
     """
 
-    def __init__(self, reference_repository: ReferenceRepository) -> None:
+    def __init__(self, reference_repository: ReferenceRepository,
+                 import_repository: ImportRepository = None) -> None:
         """Constructor initialises self._reference repository
         from reference repository object given as parameter
         """
         self._reference_repository = reference_repository
+        self._import_repository = import_repository or ImportRepository()
 
     def create_reference(self, reference_type: ReferenceType, reference: dict, manual_key=None):
         """Validates reference dictionary fields
@@ -30,60 +244,293 @@ class ReferenceServices:
         Args:
           reference (Reference): Refence object
         """
-        ref_keys = reference.keys()
-
-        ref_type_keys = reference_type.get_keys()
-        ref_type_mandatory_keys = reference_type.get_mandatory_keys()
+        ref_object = self.build_reference(reference_type, reference, manual_key)
+        self._reference_repository.save(ref_object)
+        return ref_object.key
 
-        if not all(item in ref_type_keys for item in ref_keys):
-            raise ValueError(EXTRA_KEYS_ERROR)
+    def build_reference(self, reference_type: ReferenceType, reference: dict, manual_key=None,
+                        reserved_keys=None):
+        """Validates reference dictionary fields and
+        generates Reference object without saving it
 
-        if not all((m in reference and reference[m] is not None) for m in ref_type_mandatory_keys):
-            raise ValueError(MISSING_FIELD_ERROR)
+        Args:
+            reference_type (ReferenceType): Type of the reference
+            reference (dict): Field-value pairs of the reference
+            manual_key (str, optional): Key of the reference, constructed if not given
+            reserved_keys (set, optional): Keys not saved yet that constructed key must not use
+        Raises:
+            ValueError: Raises, if fields are not valid
+        Returns:
+            Reference: Validated Reference object
+        """
+        validate_reference(reference_type, reference)
 
         key: str
 
         if manual_key is None:
             key = self.construct_bibtex_key(
-                reference["author"], reference["year"])
+                reference["author"], reference["year"], reserved_keys)
         else:
             key = manual_key
 
-        for field, value in reference.items():
+        return Reference(reference_type, key, reference)
+
+    def update_reference(self, reference_key, changes: dict):
+        """Validates changed fields and updates them
+        to the saved reference
+
+        Args:
+            reference_key (str): Key of the reference
+            changes (dict): Field-value pairs to be changed
+        Raises:
+            ValueError: Raises, if a field is not valid or key not found
+        Returns:
+            Reference: Updated reference
+        """
+        for field, value in changes.items():
             self.validate_field(field, value)
 
-        ref_object = Reference(reference_type, key, reference)
-        self._reference_repository.save(ref_object)
-        return key
+        return self._reference_repository.update_fields(reference_key, changes)
 
-    def add_from_file(self, file_path):
+    def add_from_file(self, file_path, *, batch_size=IMPORT_BATCH_SIZE, workers=1,
+                      on_duplicate=DuplicatePolicy.SKIP, flag_missing=False,
+                      resume=False, progress=None):
         """Loads references from
         database file and saves them into database.
+
+        File is read and parsed in batches of entries, and
+        valid references of each batch are saved in one transaction
+        together with a checkpoint of the import, so an interrupted import
+        can be resumed. Checkpoint is deleted when the import finishes.
+        Only one batch of entries is held in memory at a time, but keys
+        and hashes of all entries of the file are kept for finding
+        repeated keys and unchanged entries, so memory use still grows
+        with the amount of entries in the file, a few hundred bytes per entry.
+        Content hash of every saved entry is stored with the file path,
+        so importing the same file again skips unchanged entries and
+        updates changed ones in place.
+        With more than one worker, batches are parsed and validated
+        in parallel processes and saved in file order by this process.
+
+        Args:
+            file_path (str): Path of the BibTeX file
+            batch_size (int, optional): Amount of entries in a batch
+            workers (int, optional): Amount of processes parsing batches
+            on_duplicate (DuplicatePolicy, optional): What to do with entries whose key
+            is already in database, skipped with an error by default
+            flag_missing (bool, optional): Flag references imported earlier from
+            the file but no longer in it, see ImportRepository.get_missing_keys.
+            Not done when the import is resumed, as the whole file is not read.
+            resume (bool, optional): Continue from the checkpoint of an interrupted
+            import of the file, if there is one
+            progress (callable, optional): Called after every batch with entries
+            and bytes read so far and size of the file in bytes
+        Returns:
+            list: (key, error) tuples for entries that were not saved
+        """
+        imported = self._imported_source(file_path, resume)
+        errors = self._import_sources([imported], batch_size=batch_size, workers=workers,
+                                      on_duplicate=on_duplicate, progress=progress)
+        self._finish_import(imported, flag_missing)
+        return errors[0]
+
+    def add_from_files(self, pattern, *, batch_size=IMPORT_BATCH_SIZE, workers=1,
+                       on_duplicate=DuplicatePolicy.SKIP, flag_missing=False,
+                       resume=False, progress=None):
+        """Loads references from many BibTeX files like add_from_file.
+        Batches of all files are parsed by the same worker processes,
+        so small files are parsed in parallel with each other and the
+        largest file, while one writer saves them file by file.
+
+        Args:
+            pattern (str): Directory searched recursively for .bib files or glob pattern
+            Other arguments are as in add_from_file, progress covers all files
+        Returns:
+            dict: Path of every file -> list of (key, error) tuples for its entries
+            that were not saved
+        """
+        file_paths = find_bibtex_files(pattern)
+        sources = [self._imported_source(file_path, resume) for file_path in file_paths]
+        errors = self._import_sources(sources, batch_size=batch_size, workers=workers,
+                                      on_duplicate=on_duplicate, progress=progress)
+        for imported in sources:
+            self._finish_import(imported, flag_missing)
+        return dict(zip(file_paths, errors))
+
+    def _import_sources(self, sources, *, batch_size, workers, on_duplicate, progress):
+        """Saves batches of files in file order
+
+        Args:
+            sources (list): ImportedSource objects
+            Other arguments are as in add_from_file
+        Returns:
+            list: List of (key, error) tuples for every file
+        """
+        errors = [[] for _ in sources]
+        total_size = sum(imported.size for imported in sources)
+        # Entries and bytes read from all files, including the parts skipped by resuming
+        read_entries = sum(imported.entry_count for imported in sources)
+        read_bytes = sum(imported.offset for imported in sources)
+
+        for prepared, count, offset, index in prepare_batches(
+                iter_source_batches(sources, batch_size), workers):
+            imported = sources[index]
+            read_entries += count
+            read_bytes += offset - imported.offset
+            errors[index].extend(self._save_prepared(
+                prepared, on_duplicate, imported, imported.advance(count, offset)))
+            if progress is not None:
+                progress(read_entries, read_bytes, total_size)
+
+        return errors
+
+    def _finish_import(self, imported, flag_missing):
+        """Flags missing references and deletes checkpoint of an imported file
+
+        Args:
+            imported (ImportedSource): Imported file
+            flag_missing (bool): Flag references no longer in the file,
+            if the whole file was read
+        """
+        if flag_missing and imported.start_offset == 0:
+            self._flag_missing(imported)
+        if self._import_repository.get_checkpoint(imported.path) is not None:
+            self._import_repository.delete_checkpoint(imported.path)
+
+    def _imported_source(self, file_path, resume):
+        """Loads earlier imported entries and checkpoint of a file
+
+        Args:
+            file_path (str): Path of the BibTeX file
+            resume (bool): Start from the checkpoint, if there is one
+        Returns:
+            ImportedSource: File to be imported
+        """
+        source = os.path.realpath(file_path)
+        checkpoint = self._import_repository.get_checkpoint(source) if resume else None
+        return ImportedSource(
+            source, self._import_repository.get_imported_entries(source), checkpoint)
+
+    def _flag_missing(self, imported):
+        """Flags references that were not found from their source file
+        and clears the flag of found ones, writing only changed flags
+
+        Args:
+            imported (ImportedSource): Imported file
         """
-        with open(file_path, "r", encoding="utf-8") as references_data:
-            bib_data = bibtexparser.load(references_data)
+        vanished = [key for key, (_, missing, _) in imported.entries.items()
+                    if not missing and key not in imported.found_keys]
+        returned = [key for key in imported.found_keys if imported.entries[key][1]]
+        if vanished:
+            self._import_repository.set_missing(vanished)
+        if returned:
+            self._import_repository.set_missing(returned, missing=False)
 
+    def _save_prepared(self, prepared, on_duplicate, imported, checkpoint):
+        """Saves valid entries prepared by prepare_batch.
+        Entries unchanged since the last import of the file are skipped
+        and changed ones are updated in place. Other keys already in
+        database are looked up for the whole batch with one query and
+        handled by on_duplicate before writing.
+
+        Args:
+            prepared (list): (reference type, key, fields, error, hash) tuples
+            on_duplicate (DuplicatePolicy): What to do with keys already in database
+            imported (ImportedSource): File the entries are imported from
+            checkpoint (tuple): (byte offset, entries) of the file imported after the batch
+        Returns:
+            list: (key, error) tuples for entries that were not saved
+        """
         errors = []
-        for entry in bib_data.entries:
-            # value after the @ symbol in bibtex
-            ref_type_literal = entry["ENTRYTYPE"]
-            ref_key = entry["ID"]
-            del entry["ENTRYTYPE"]
-            del entry["ID"]
-
-            # Don't load unsupported reference types
-            if ref_type_literal not in ReferenceType.get_literals():
+        seen_keys = imported.seen_keys
+        references, file_entries = self._build_references(prepared, imported, seen_keys, errors)
+
+        changed_keys = {reference.key for _, reference in references
+                        if imported.is_changed(reference.key)}
+        existing_keys = self._reference_repository.get_existing_keys(
+            [reference.key for _, reference in references]) - changed_keys
+        if existing_keys and on_duplicate is not DuplicatePolicy.OVERWRITE:
+            references = self._handle_existing(references, existing_keys, on_duplicate,
+                                               seen_keys, errors)
+
+        positions = {reference.key: position for position, reference in references}
+        saved_errors = self._reference_repository.save_many(
+            [reference for _, reference in references],
+            overwrite=bool(changed_keys) or on_duplicate is DuplicatePolicy.OVERWRITE,
+            source=imported.path,
+            hashes=[file_entries[position][0] for position, _ in references],
+            entry_keys=[file_entries[position][1] for position, _ in references],
+            checkpoint=checkpoint)
+        for ref_key, error in saved_errors:
+            errors.append((positions[ref_key], ref_key, error))
+
+        return [(ref_key, error) for _, ref_key, error in sorted(errors, key=lambda e: e[0])]
+
+    def _build_references(self, prepared, imported, seen_keys, errors):
+        """Builds references of new and changed valid entries of a batch.
+        Changed entries get the key they were saved with earlier.
+
+        Args:
+            prepared (list): (reference type, key, fields, error, hash) tuples
+            imported (ImportedSource): File the entries are imported from
+            seen_keys (set): Keys used in the file so far, new keys are added
+            errors (list): (position, key, error) tuples, invalid entries are added
+        Returns:
+            tuple: List of (position, Reference) tuples and dictionary
+            position -> (hash, key in the file)
+        """
+        references = []
+        file_entries = {}
+        for position, (ref_type, ref_key, fields, error, entry_hash) in enumerate(prepared):
+            if ref_key in seen_keys:
+                errors.append((position, ref_key, KEY_ALREADY_EXISTS_ERROR))
                 continue
 
-            ref_type = ReferenceType(ref_type_literal)
+            if ref_key is not None:
+                seen_keys.add(ref_key)
 
-            try:
-                self.create_reference(ref_type, entry, ref_key)
-            except ValueError as error:
-                errors.append((ref_key, error))
-            except IntegrityError:
-                errors.append((ref_key, KEY_ALREADY_EXISTS_ERROR))
-        return errors
+            unchanged_key = imported.find_unchanged(ref_key, entry_hash)
+            if unchanged_key is not None:
+                seen_keys.add(unchanged_key)
+                continue
+
+            if error is not None:
+                errors.append((position, ref_key, error))
+                continue
+
+            if ref_key is None:
+                key = self.construct_bibtex_key(fields["author"], fields["year"], seen_keys)
+            else:
+                key = imported.saved_key(ref_key)
+            seen_keys.add(key)
+            references.append((position, Reference(ref_type, key, fields)))
+            file_entries[position] = (entry_hash, ref_key)
+
+        return references, file_entries
+
+    def _handle_existing(self, references, existing_keys, on_duplicate, seen_keys, errors):
+        """Skips or renames references whose key is already in database
+
+        Args:
+            references (list): (position, Reference) tuples
+            existing_keys (set): Keys already in database
+            on_duplicate (DuplicatePolicy): SKIP or RENAME
+            seen_keys (set): Keys used in the file so far, renamed keys are added
+            errors (list): (position, key, error) tuples, skipped references are added
+        Returns:
+            list: (position, Reference) tuples to be saved
+        """
+        kept = []
+        for position, reference in references:
+            if reference.key not in existing_keys:
+                kept.append((position, reference))
+            elif on_duplicate is DuplicatePolicy.RENAME:
+                reference.key = self._reference_repository.get_free_key(reference.key, seen_keys)
+                seen_keys.add(reference.key)
+                kept.append((position, reference))
+            else:
+                errors.append((position, reference.key, KEY_ALREADY_EXISTS_ERROR))
+        return kept
 
     def validate_field(self, field, value):
         """Validate the user input for a specific field.
@@ -94,36 +541,18 @@ class ReferenceServices:
         Raises:
             ValueError
         """
+        validate_field(field, value)
 
-        if field == "year":
-            year_pattern = r"^\d{4}$"
-            if not re.match(year_pattern, str(value)):
-                raise ValueError(YEAR_FORMAT_ERROR)
-        elif field == "month":
-            month_pattern = re.compile(
-                r'^(0?[1-9]|1[0-2]|jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?| \
-                jul(?:y)?|aug(?:ust)?|sep(?:tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)$',
-                re.IGNORECASE)
-            if not re.match(month_pattern, str(value)):
-                raise ValueError(MONTH_FORMAT_ERROR)
-        elif field == "volume":
-            regex = r"^\d+$"
-            if not re.match(regex, str(value)):
-                raise ValueError(VOLUME_FORMAT_ERROR)
-        elif field == "pages":
-            regex = r"^\d+(-{1,2}\d+)?$"
-            # regex = r"^\d+([-]\d+)?$"
-            if not re.match(regex, str(value)):
-                raise ValueError(PAGES_FORMAT_ERROR)
-
-    def construct_bibtex_key(self, author: str, year: int) -> str:
+    def construct_bibtex_key(self, author: str, year: int, reserved_keys=None) -> str:
         """Algorithm for constucting bibtex -key.
         if author: Powers and year: 2023 -> powers23
+        if powers23 is already used -> powers23_1
         Expected author notation: {Lastname, Firstname}
         In case for company name etc. notation does not matter.
         Args:
             author (String): Reference author
             year (Int): Reference year
+            reserved_keys (set, optional): Keys not saved yet that can not be used
         """
         author = author.lower()
         if "," in author:
@@ -134,10 +563,7 @@ class ReferenceServices:
             author = author[:7]
         year = str(year)[2:]
         bibtex_key = author + year
-        previous = self._reference_repository.get_similar_key_count(bibtex_key)
-        if previous > 0:
-            bibtex_key = bibtex_key + "_" + str(previous)
-        return bibtex_key
+        return self._reference_repository.get_free_key(bibtex_key, reserved_keys)
 
     def delete_reference(self, reference_key):
         """Calls for repository method to delete
@@ -150,14 +576,19 @@ class ReferenceServices:
         self._reference_repository.delete_from_db(reference_key)
 
     def filter_references(self, references: list, option:int, arg: str) -> list:
-        """Filters references based on type and filter
+        """Filters references based on type and filter.
+        A ReferenceSnapshot is filtered with vectorized operations.
         Args:
-            references (list): List of reference objects
-            type (int): Type of filter (0 = author, 1 = title, 2 = year)
+            references (list or ReferenceSnapshot): List of reference objects
+            type (int): Type of filter (0 = author, 1 = year, 2 = title)
             filter (str): Filter string
         Returns:
             list: Filtered list
         """
+        if isinstance(references, ReferenceSnapshot):
+            field = ("author", "year", "title")[option]
+            return references.take(references.containing(field, arg))
+
         if option == 0:
             filtered_list = [obj for obj in references
                     if re.search(re.escape(arg), str(obj.fields["author"]), re.IGNORECASE)]
@@ -171,3 +602,23 @@ class ReferenceServices:
                     if re.search(re.escape(arg), str(obj.fields["title"]), re.IGNORECASE)]
 
         return filtered_list
+
+    def search_references(self, references: list, option: int, arg: str) -> list:
+        """Searches references based on type and filter.
+        Author and title are searched from the database full-text index
+        matching beginnings of words, year is filtered from the given list.
+        Fuzzy search finds misspelled authors and titles from the trigram index.
+        Args:
+            references (list or ReferenceSnapshot): List of reference objects, used for year
+            type (int): Type of filter (0 = author, 1 = year, 2 = title, 3 = fuzzy)
+            filter (str): Filter string
+        Returns:
+            list: Matching references
+        """
+        if option == 1:
+            return self.filter_references(references, option, arg)
+        if option == 3:
+            return self._reference_repository.fuzzy_search(arg, limit=SEARCH_RESULT_LIMIT)
+
+        field = "author" if option == 0 else "title"
+        return self._reference_repository.search(arg, [field], SEARCH_RESULT_LIMIT)
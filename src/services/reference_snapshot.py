@@ -0,0 +1,149 @@
+"""Module for a columnar snapshot of references filtered with NumPy.
+NumPy is optional, without it references are filtered as a list."""
+import re
+from functools import cached_property
+from entities.reference import ReferenceType
+from constants import NUMPY_MISSING_ERROR, INVALID_SEARCH_FIELD_ERROR
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Fields that can be kept as lowercase text buffers
+TEXT_FIELDS = ("author", "title", "year")
+# Separates the values in a text buffer, searched text never contains it
+SEPARATOR = "\x00"
+MISSING_YEAR = -1
+TYPE_CODES = {reference_type: code for code, reference_type in enumerate(ReferenceType)}
+
+
+def create_snapshot(references: list):
+    """Returns columnar snapshot of references if NumPy is installed
+
+    Args:
+        references (list): Reference objects
+    Returns:
+        ReferenceSnapshot or list: Snapshot, or the list itself without NumPy
+    """
+    if np is None:
+        return references
+    return ReferenceSnapshot(references)
+
+
+class ReferenceSnapshot:
+    """Read-only columnar copy of references. Years and reference types
+    are kept in integer arrays, text fields as one lowercase string with
+    the start offset of every value. Each column is built when a filter
+    first needs it. Filters return sorted index arrays that can be
+    combined with numpy.intersect1d and numpy.union1d.
+
+    Args:
+        references (list): Reference objects
+    Raises:
+        ImportError: Raises, if NumPy is not installed
+
+    Attributes:
+        references (list): References in the order of the arrays
+    """
+
+    def __init__(self, references: list):
+        if np is None:
+            raise ImportError(NUMPY_MISSING_ERROR)
+        self.references = list(references)
+        self._texts = {}
+
+    @cached_property
+    def years(self):
+        """numpy.ndarray: Year of every reference, MISSING_YEAR if not set"""
+        return np.fromiter(
+            (self._year(reference.fields.get("year")) for reference in self.references),
+            dtype=np.int32, count=len(self.references))
+
+    @cached_property
+    def types(self):
+        """numpy.ndarray: Code of the type of every reference in TYPE_CODES"""
+        return np.fromiter(
+            (TYPE_CODES[reference.reference_type] for reference in self.references),
+            dtype=np.uint8, count=len(self.references))
+
+    @staticmethod
+    def _year(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return MISSING_YEAR
+
+    def _text_column(self, field):
+        values = [str(reference.fields.get(field)).lower() for reference in self.references]
+        lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+        offsets = np.zeros(len(values), dtype=np.int64)
+        np.cumsum(lengths[:-1] + 1, out=offsets[1:])
+        return SEPARATOR.join(values), offsets
+
+    def __len__(self):
+        return len(self.references)
+
+    def take(self, indices) -> list:
+        """Returns references of an index array
+
+        Args:
+            indices (numpy.ndarray): Indices returned by a filter
+        Returns:
+            list: Reference objects
+        """
+        return [self.references[index] for index in indices]
+
+    def years_between(self, year_from=None, year_to=None):
+        """Returns indices of references published in a range of years
+
+        Args:
+            year_from (int, optional): First year included
+            year_to (int, optional): Last year included
+        Returns:
+            numpy.ndarray: Indices of matching references
+        """
+        mask = self.years != MISSING_YEAR
+        if year_from is not None:
+            mask &= self.years >= year_from
+        if year_to is not None:
+            mask &= self.years <= year_to
+        return np.flatnonzero(mask)
+
+    def of_types(self, reference_types):
+        """Returns indices of references of given types
+
+        Args:
+            reference_types (iterable): ReferenceType values
+        Returns:
+            numpy.ndarray: Indices of matching references
+        """
+        codes = [TYPE_CODES[reference_type] for reference_type in reference_types]
+        return np.flatnonzero(np.isin(self.types, codes))
+
+    def containing(self, field, text):
+        """Returns indices of references whose field contains text,
+        ignoring case
+
+        Args:
+            field (str): "author", "title" or "year"
+            text (str): Text searched
+        Raises:
+            ValueError: Raises, if field is not one of TEXT_FIELDS
+        Returns:
+            numpy.ndarray: Indices of matching references
+        """
+        if field not in TEXT_FIELDS:
+            raise ValueError(INVALID_SEARCH_FIELD_ERROR)
+        if field not in self._texts:
+            self._texts[field] = self._text_column(field)
+        buffer, offsets = self._texts[field]
+        text = text.lower()
+        if not text:
+            return np.arange(len(self))
+        if SEPARATOR in text:
+            return np.array([], dtype=np.int64)
+        # Matches never span the separator, so every match is inside one value
+        positions = np.fromiter((match.start() for match in re.finditer(re.escape(text), buffer)),
+                                dtype=np.int64)
+        return np.unique(np.searchsorted(offsets, positions, side="right") - 1)
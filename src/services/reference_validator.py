@@ -0,0 +1,101 @@
+"""Module for validating reference fields"""
+import re
+from entities.reference import ReferenceType
+from constants import MISSING_FIELD_ERROR, YEAR_FORMAT_ERROR, MONTH_FORMAT_ERROR, \
+    VOLUME_FORMAT_ERROR, PAGES_FORMAT_ERROR, EXTRA_KEYS_ERROR
+
+# Field -> (compiled pattern the value must match, error if it does not)
+FIELD_FORMATS = {
+    "year": (re.compile(r"^\d{4}$"), YEAR_FORMAT_ERROR),
+    "month": (re.compile(
+        r"^(0?[1-9]|1[0-2]|jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?|"
+        r"jul(?:y)?|aug(?:ust)?|sep(?:tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)$",
+        re.IGNORECASE), MONTH_FORMAT_ERROR),
+    "volume": (re.compile(r"^\d+$"), VOLUME_FORMAT_ERROR),
+    "pages": (re.compile(r"^\d+(-{1,2}\d+)?$"), PAGES_FORMAT_ERROR)
+}
+
+
+class ReferenceValidator:
+    """Validator for fields of one reference type.
+    Allowed, mandatory and formatted fields are resolved once
+    when the validator is created.
+
+    Attributes:
+        reference_type (ReferenceType): Type validated
+    """
+
+    def __init__(self, reference_type: ReferenceType):
+        self.reference_type = reference_type
+        self._allowed_fields = frozenset(reference_type.get_keys())
+        self._mandatory_fields = [field for field in reference_type.get_keys()
+                                  if field in reference_type.get_mandatory_keys()]
+        self._field_formats = {field: FIELD_FORMATS[field]
+                               for field in self._allowed_fields if field in FIELD_FORMATS}
+
+    def validate(self, fields: dict) -> list:
+        """Validates fields of one reference
+
+        Args:
+            fields (dict): Field-value pairs of the reference
+        Returns:
+            list: Every error found, empty if fields are valid
+        """
+        errors = []
+
+        if not self._allowed_fields.issuperset(fields):
+            errors.append(EXTRA_KEYS_ERROR)
+
+        if any(fields.get(field) is None for field in self._mandatory_fields):
+            errors.append(MISSING_FIELD_ERROR)
+
+        for field, value in fields.items():
+            field_format = self._field_formats.get(field)
+            if field_format and not field_format[0].match(str(value)):
+                errors.append(field_format[1])
+
+        return errors
+
+
+VALIDATORS = {reference_type: ReferenceValidator(reference_type)
+              for reference_type in ReferenceType}
+
+
+def validate_batch(batch: list) -> list:
+    """Validates references of any type
+
+    Args:
+        batch (list): (ReferenceType, fields) tuples
+    Returns:
+        list: List of errors for every reference, in the same order
+    """
+    return [VALIDATORS[reference_type].validate(fields) for reference_type, fields in batch]
+
+
+def validate_reference(reference_type: ReferenceType, fields: dict):
+    """Validates fields of a reference
+    Text type fields are only validated for existence not for contents
+
+    Args:
+        reference_type (ReferenceType): Type of the reference
+        fields (dict): Field-value pairs of the reference
+    Raises:
+        ValueError: Raises with every error found, if fields are not valid
+    """
+    errors = VALIDATORS[reference_type].validate(fields)
+    if errors:
+        raise ValueError("; ".join(errors))
+
+
+def validate_field(field, value):
+    """Validate the value of a specific field.
+        Raises ValueError in case of invalid fields
+    Args:
+        field (str): Field to evaluate
+        value (int/str): Value to be evaluated
+    Raises:
+        ValueError
+    """
+    field_format = FIELD_FORMATS.get(field)
+    if field_format and not field_format[0].match(str(value)):
+        raise ValueError(field_format[1])
@@ -0,0 +1,46 @@
+"""Unittests for async_reference_services module"""
+import threading
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+from repositories.reference_repository import ReferenceRepository
+from services.reference_services import ReferenceServices
+from services.async_reference_services import AsyncReferenceServices
+from tests.testcases import INPRO_VALID2, ARTICLE_VALID
+
+
+class TestAsyncReferenceServices(IsolatedAsyncioTestCase):
+    """Tests for asynchronous reference services facade"""
+
+    def setUp(self):
+        self.repository = ReferenceRepository()
+        self.repository.empty_all_tables()
+        self.ref_services = ReferenceServices(self.repository)
+        self.async_services = AsyncReferenceServices(self.repository, self.ref_services)
+
+    def tearDown(self):
+        self.async_services.shutdown()
+
+    async def test_save_many_and_load_all(self):
+        errors = await self.async_services.save_many([INPRO_VALID2, ARTICLE_VALID])
+        self.assertEqual(errors, [])
+        references = await self.async_services.load_all()
+        self.assertEqual(len(references), 2)
+
+    async def test_search(self):
+        await self.async_services.save_many([INPRO_VALID2, ARTICLE_VALID])
+        results = await self.async_services.search("exploring")
+        self.assertEqual([reference.key for reference in results], [INPRO_VALID2.key])
+
+    async def test_calls_are_run_outside_event_loop_thread(self):
+        self.ref_services.delete_reference = MagicMock(
+            side_effect=lambda key: threading.current_thread())
+        thread = await self.async_services.delete_reference("Key")
+        self.ref_services.delete_reference.assert_called_with("Key")
+        self.assertIsNot(thread, threading.current_thread())
+
+    async def test_create_snapshot(self):
+        references = [INPRO_VALID2, ARTICLE_VALID]
+        snapshot = await self.async_services.create_snapshot(references)
+        self.assertEqual(len(snapshot), 2)
+        results = await self.async_services.search_references(snapshot, 1, "2024")
+        self.assertEqual(results, [ARTICLE_VALID])
@@ -0,0 +1,58 @@
+"""Unittests for bibtex_reader module"""
+import io
+import unittest
+from services.bibtex_reader import iter_blocks, iter_batches, parse_batch, read_keys
+
+BIBTEX = b"""% Comment line
+@string{conf = "Proceedings of the Conference"}
+
+@inproceedings{first23,
+    title     = {First {Title}},
+    author    = {First, Author},
+    booktitle = conf,
+    year      = 2023
+}
+
+@comment{ignored}
+@article{second23,
+    title   = {Second},
+    author  = {Second, Author},
+    journal = {Journal},
+    year    = 2023
+}
+"""
+
+
+class TestBibtexReader(unittest.TestCase):
+    """Tests for reading BibTeX files in batches"""
+
+    def test_blocks_are_split_at_entry_boundaries(self):
+        blocks = list(iter_blocks(io.BytesIO(BIBTEX)))
+        self.assertEqual([block[0] for block in blocks],
+                         ["string", "inproceedings", "comment", "article"])
+        self.assertTrue(blocks[1][1].startswith("@inproceedings{first23"))
+        self.assertTrue(blocks[1][1].endswith("}\n"))
+        self.assertEqual(blocks[-1][2], len(BIBTEX))
+
+    def test_batches_contain_given_amount_of_entries(self):
+        batches = list(iter_batches(io.BytesIO(BIBTEX), 1))
+        self.assertEqual([batch[1] for batch in batches], [1, 1])
+
+    def test_string_definitions_are_included_in_every_batch(self):
+        for batch_text, _, _ in iter_batches(io.BytesIO(BIBTEX), 1):
+            self.assertIn("@string{conf", batch_text)
+        entries = parse_batch(next(iter_batches(io.BytesIO(BIBTEX), 1))[0])
+        self.assertEqual(entries[0]["booktitle"], "Proceedings of the Conference")
+
+    def test_batches_can_start_from_checkpoint_offset(self):
+        offset = next(iter_batches(io.BytesIO(BIBTEX), 1))[2]
+        batches = list(iter_batches(io.BytesIO(BIBTEX), 1, offset))
+        self.assertEqual(len(batches), 1)
+        self.assertIn("@string{conf", batches[0][0])
+        self.assertIn("@article{second23", batches[0][0])
+        self.assertNotIn("@inproceedings{first23", batches[0][0])
+
+    def test_keys_are_read_up_to_offset(self):
+        offset = list(iter_blocks(io.BytesIO(BIBTEX)))[2][2]
+        self.assertEqual(read_keys(io.BytesIO(BIBTEX), offset), {"first23"})
+        self.assertEqual(read_keys(io.BytesIO(BIBTEX), len(BIBTEX)), {"first23", "second23"})
@@ -0,0 +1,35 @@
+"""Unittests for database_connection module"""
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from database_connection import get_database_connection
+
+
+class TestDatabaseConnection(unittest.TestCase):
+    """Tests for per-thread database connections"""
+
+    def setUp(self):
+        self.connection = get_database_connection()
+        self.connection.execute("DELETE FROM Authors")
+        self.connection.commit()
+
+    def test_same_connection_is_returned_in_same_thread(self):
+        self.assertIs(get_database_connection(), self.connection)
+
+    def test_other_thread_gets_own_connection(self):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            other = executor.submit(get_database_connection).result()
+        self.assertIsNot(other, self.connection)
+
+    def test_wal_journal_mode_is_enabled(self):
+        journal_mode = self.connection.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(journal_mode, "wal")
+
+    def test_other_thread_can_read_during_write(self):
+        def count_authors():
+            return get_database_connection().execute("SELECT COUNT(*) FROM Authors").fetchone()[0]
+
+        self.connection.execute("INSERT INTO Authors (author) VALUES ('Writer, Busy')")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(executor.submit(count_authors).result(), 0)
+            self.connection.commit()
+            self.assertEqual(executor.submit(count_authors).result(), 1)
@@ -2,6 +2,7 @@
 from unittest.mock import MagicMock
 from gui import GUI
 from unittest import IsolatedAsyncioTestCase
+from textual.widgets import RadioSet
 from entities.reference import Reference
 from repositories.reference_repository import ReferenceRepository, ReferenceType
 from services.reference_services import ReferenceServices
@@ -122,6 +123,39 @@ class TestGUI(IsolatedAsyncioTestCase):
             await gui.press("escape")
             self.assertEqual(str(self.gui.screen), "Screen(id='_default')")
 
+    async def test_list_by_key_loads_more_keys_when_scrolled(self):
+        """Test that keys are loaded page by page"""
+        references = [Reference(ReferenceType.INPROCEEDINGS, f"Key{index:03}",
+                                self.inpro_all.fields) for index in range(150)]
+        self.ref_repository.save_many(references)
+        async with self.gui.run_test() as gui:
+            await gui.press("l")
+            option_list = self.gui.screen.query_one("#optionList")
+            self.assertEqual(option_list.option_count, 100)
+            await gui.press("end")
+            self.assertEqual(option_list.option_count, 150)
+            await gui.press("ctrl+j")
+            self.assertEqual(self.gui.screen.reference.key, "Key099")
+
+    async def test_add_from_bib_file(self):
+        """Test that references are imported from chosen file"""
+        with open("data/test_build.bib", encoding="utf-8") as bib_file:
+            self.gui.file_dialog.askopenfile.return_value = bib_file
+            async with self.gui.run_test() as gui:
+                await gui.press("f")
+                await gui.pause()
+                self.assertEqual(str(self.gui.screen), "Screen(id='_default')")
+        self.assertEqual(len(self.ref_repository.load_all()), 4)
+
+    async def test_add_from_directory(self):
+        """Test that references are imported from all files of chosen folder"""
+        self.gui.file_dialog.askdirectory.return_value = "data"
+        async with self.gui.run_test() as gui:
+            await gui.press("m")
+            await gui.pause()
+            self.assertEqual(str(self.gui.screen), "Screen(id='_default')")
+        self.assertEqual(len(self.ref_repository.load_all()), 6)
+
     async def test_deleting_reference(self):
         """Test for deleting a reference"""
         self.ref_repository.save(self.inpro_all)
@@ -147,6 +181,19 @@ class TestGUI(IsolatedAsyncioTestCase):
             await gui.click("#no")
             self.ref_services.delete_reference.assert_not_called()
 
+    async def test_changing_filter_with_empty_input_shows_all_references(self):
+        """Test that every reference stays shown when filter type changes without input"""
+        self.ref_repository.save(self.inpro_all)
+        async with self.gui.run_test() as gui:
+            await gui.press("s")
+            await gui.press("tab")
+            await gui.press("right", "right")
+            await gui.press("enter")
+            await gui.pause()
+            radioset = self.gui.screen.query_one(RadioSet)
+            self.assertEqual(radioset.pressed_index, 2)
+            self.assertEqual(radioset.border_subtitle, "Results: 1")
+
     async def test_show_all_references_in_bibtex(self):
         """Test for showing all references"""
         self.ref_repository.save(self.inpro_all)
@@ -0,0 +1,109 @@
+"""Unittests for initialize_database module"""
+import unittest
+import sqlite3
+from initialize_database import create_tables, upgrade_tables, get_schema_version, \
+    SCHEMA_VERSION
+from entities.reference import Reference, ReferenceType
+
+
+class TestInitializeDatabase(unittest.TestCase):
+    """Tests for creating and migrating database tables"""
+
+    def setUp(self):
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.row_factory = sqlite3.Row
+
+    def tearDown(self):
+        self.connection.close()
+
+    def test_empty_database_has_version_zero(self):
+        self.assertEqual(get_schema_version(self.connection), 0)
+
+    def test_create_tables_creates_latest_version(self):
+        create_tables(self.connection)
+        self.assertEqual(get_schema_version(self.connection), SCHEMA_VERSION)
+
+    def test_lookup_values_are_unique_after_create(self):
+        create_tables(self.connection)
+        self.connection.execute("INSERT INTO Authors (author) VALUES ('Smith, John')")
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.connection.execute("INSERT INTO Authors (author) VALUES ('Smith, John')")
+
+    def test_upgrade_removes_duplicate_lookup_rows(self):
+        create_tables(self.connection, version=1)
+        cursor = self.connection.cursor()
+        cursor.executemany("INSERT INTO Authors (author) VALUES (?)",
+                           [("Smith, John",), ("Doe, Jane",), ("Smith, John",)])
+        cursor.executemany("INSERT INTO Bibrefs (key, title, author_id, year) VALUES (?, ?, ?, ?)",
+                           [("smith23", "First", 1, 2023), ("smith23_1", "Second", 3, 2023),
+                            ("doe23", "Third", 2, 2023)])
+        self.connection.commit()
+
+        upgrade_tables(self.connection)
+
+        self.assertEqual(get_schema_version(self.connection), SCHEMA_VERSION)
+        cursor.execute("SELECT COUNT(*) FROM Authors")
+        self.assertEqual(cursor.fetchone()[0], 2)
+        cursor.execute("""SELECT Bibrefs.key, Authors.author FROM Bibrefs
+                       JOIN Authors ON Bibrefs.author_id = Authors.id ORDER BY Bibrefs.key""")
+        self.assertEqual([tuple(row) for row in cursor.fetchall()],
+                         [("doe23", "Doe, Jane"), ("smith23", "Smith, John"),
+                          ("smith23_1", "Smith, John")])
+
+    def test_deleting_reference_deletes_its_import_hash(self):
+        create_tables(self.connection)
+        cursor = self.connection.cursor()
+        cursor.execute("INSERT INTO Bibrefs (key, title, author_id, year) VALUES ('a23', 'A', 1, 2023)")
+        cursor.execute("INSERT INTO ImportedEntries (key, source, hash) VALUES ('a23', 'a.bib', 'x')")
+        cursor.execute("DELETE FROM Bibrefs WHERE key = 'a23'")
+        cursor.execute("SELECT COUNT(*) FROM ImportedEntries")
+        self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_upgrade_renders_bibtex_of_existing_references(self):
+        create_tables(self.connection, version=5)
+        cursor = self.connection.cursor()
+        cursor.execute("INSERT INTO Authors (author) VALUES ('Smith, John')")
+        cursor.execute("INSERT INTO Referencetypes (referencetype) VALUES ('ReferenceType.ARTICLE')")
+        cursor.execute("INSERT INTO Referencetypes (referencetype) VALUES ('ReferenceType.BOOK')")
+        cursor.execute("""INSERT INTO Bibrefs (key, title, author_id, year, referencetype_id, journal)
+                       VALUES ('smith23', 'Title', 1, 2023, 1, 'Journal')""")
+        cursor.execute("""INSERT INTO Bibrefs (key, title, author_id, year, referencetype_id)
+                       VALUES ('smith24', 'Book', 1, 2024, 2)""")
+        self.connection.commit()
+
+        upgrade_tables(self.connection)
+
+        cursor.execute("SELECT bibtex FROM Bibrefs ORDER BY key")
+        self.assertEqual([row["bibtex"] for row in cursor], [str(Reference(
+            ReferenceType.ARTICLE, "smith23",
+            {"title": "Title", "author": "Smith, John", "journal": "Journal", "year": 2023})), None])
+
+    def test_upgrade_keeps_keys_of_imported_entries(self):
+        create_tables(self.connection, version=7)
+        cursor = self.connection.cursor()
+        cursor.execute("INSERT INTO ImportedEntries (key, source, hash) VALUES ('a23', 'a.bib', 'x')")
+        self.connection.commit()
+
+        upgrade_tables(self.connection)
+
+        cursor.execute("SELECT entry_key FROM ImportedEntries")
+        self.assertEqual(cursor.fetchone()["entry_key"], "a23")
+
+    def test_trigram_index_follows_references(self):
+        create_tables(self.connection, version=6)
+        cursor = self.connection.cursor()
+        cursor.executemany("INSERT INTO Authors (author) VALUES (?)",
+                           [("Hirvonen, Mikko",), ("Doe, Jane",)])
+        cursor.execute("INSERT INTO Bibrefs (key, title, author_id, year) VALUES ('a', 'A', 1, 2023)")
+        self.connection.commit()
+        upgrade_tables(self.connection)
+
+        def indexed():
+            cursor.execute("SELECT rowid, author, title FROM BibrefsTrigrams ORDER BY rowid")
+            return [tuple(row) for row in cursor.fetchall()]
+
+        self.assertEqual(indexed(), [(1, "Hirvonen, Mikko", "A")])
+        cursor.execute("INSERT INTO Bibrefs (key, title, author_id, year) VALUES ('b', 'B', 2, 2023)")
+        cursor.execute("UPDATE Bibrefs SET title = 'Changed', author_id = 2 WHERE key = 'a'")
+        cursor.execute("DELETE FROM Bibrefs WHERE key = 'b'")
+        self.assertEqual(indexed(), [(1, "Doe, Jane", "Changed")])
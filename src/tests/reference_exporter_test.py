@@ -0,0 +1,53 @@
+"""Unittests for reference_exporter module"""
+import os
+import gzip
+import json
+import tempfile
+import unittest
+import pytest
+from repositories.reference_repository import ReferenceRepository
+from services.reference_exporter import export_shards, file_checksum, MANIFEST_FILE_NAME
+from constants import INVALID_SHARD_FIELD_ERROR, INVALID_COMPRESSION_ERROR
+from tests.testcases import INPRO_VALID1, INPRO_VALID2, TECHREPORT_VALID, ARTICLE_VALID
+
+
+class TestReferenceExporter(unittest.TestCase):
+    """Tests for exporting references split into many files"""
+
+    def setUp(self):
+        self.repository = ReferenceRepository()
+        self.repository.empty_all_tables()
+        self.repository.save_many([INPRO_VALID1, INPRO_VALID2, TECHREPORT_VALID, ARTICLE_VALID])
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_export_by_type_writes_file_for_every_type(self):
+        manifest = export_shards(self.tmp_dir.name, "referencetype")
+        self.assertEqual([shard["file"] for shard in manifest["files"]],
+                         ["article.bib", "inproceedings.bib", "techreport.bib"])
+        self.assertEqual([shard["entries"] for shard in manifest["files"]], [1, 2, 1])
+        with open(os.path.join(self.tmp_dir.name, "inproceedings.bib"), encoding="utf-8") as shard:
+            self.assertEqual(shard.read(), f"{INPRO_VALID1}\n{INPRO_VALID2}\n")
+
+    def test_compressed_export_with_workers_matches_manifest(self):
+        manifest = export_shards(self.tmp_dir.name, "year", "gzip", workers=2)
+        with open(os.path.join(self.tmp_dir.name, MANIFEST_FILE_NAME), encoding="utf-8") as saved:
+            self.assertEqual(json.load(saved), manifest)
+        self.assertEqual(manifest["entries"], 4)
+
+        exported = ""
+        for shard in manifest["files"]:
+            path = os.path.join(self.tmp_dir.name, shard["file"])
+            self.assertTrue(shard["file"].endswith(".bib.gz"))
+            self.assertEqual(file_checksum(path), shard["sha256"])
+            with gzip.open(path, "rt", encoding="utf-8") as shard_file:
+                exported += shard_file.read()
+        self.assertEqual(exported.count("@"), 4)
+
+    def test_unsupported_field_or_compression_raises_error(self):
+        with pytest.raises(ValueError, match=INVALID_SHARD_FIELD_ERROR):
+            export_shards(self.tmp_dir.name, "author")
+        with pytest.raises(ValueError, match=INVALID_COMPRESSION_ERROR):
+            export_shards(self.tmp_dir.name, "year", "zip")
@@ -0,0 +1,32 @@
+"""Unittests for reference query module"""
+import unittest
+import pytest
+from entities.reference import ReferenceType
+from entities.reference_query import Condition, Contains, Matches, YearBetween, TypeIn, KeyStartsWith, \
+    And, Or
+from tests.testcases import ARTICLE_VALID, PHD_VALID
+
+
+class TestReferenceQuery(unittest.TestCase):
+    """Tests for evaluating conditions in memory"""
+
+    def test_conditions_match_loaded_references(self):
+        self.assertTrue(Contains("journal", "financial").matches(ARTICLE_VALID))
+        self.assertFalse(Contains("journal", "financial").matches(PHD_VALID))
+        self.assertTrue(Matches("key", r"^mil\w+20$").matches(PHD_VALID))
+        self.assertTrue(YearBetween(2024).matches(ARTICLE_VALID))
+        self.assertFalse(YearBetween(year_to=2019).matches(PHD_VALID))
+        self.assertTrue(TypeIn(ReferenceType.PHD).matches(PHD_VALID))
+        self.assertFalse(KeyStartsWith("john").matches(ARTICLE_VALID))
+
+    def test_conditions_are_combined(self):
+        condition = Contains("author", "miller") & YearBetween(2020) | KeyStartsWith("John")
+        self.assertIsInstance(condition, Or)
+        self.assertIsInstance(condition.conditions[0], And)
+        self.assertTrue(condition.matches(PHD_VALID))
+        self.assertTrue(condition.matches(ARTICLE_VALID))
+        self.assertFalse(And(condition, TypeIn()).matches(ARTICLE_VALID))
+
+    def test_condition_without_matches_can_not_be_created(self):
+        with pytest.raises(TypeError):
+            Condition()
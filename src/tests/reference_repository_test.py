@@ -2,9 +2,16 @@
 import unittest
 import pytest
 import os
+import sqlite3
+from initialize_database import create_tables
 from repositories.reference_repository import ReferenceRepository
-from entities.reference import Reference
-from constants import KEY_DOES_NOT_EXIST_ERROR, INVALID_REFERENCE_TYPE_ERROR
+from entities.reference import Reference, ReferenceType
+from entities.reference_filter import ReferenceFilter
+from entities.reference_query import ReferenceQuery, Contains, Matches, YearBetween, TypeIn, \
+    KeyStartsWith
+from constants import KEY_DOES_NOT_EXIST_ERROR, INVALID_REFERENCE_TYPE_ERROR, \
+    KEY_ALREADY_EXISTS_ERROR, MISSING_FIELD_ERROR, INVALID_SEARCH_FIELD_ERROR, INVALID_ORDER_ERROR, \
+    EXTRA_KEYS_ERROR, INVALID_QUERY_FIELD_ERROR
 from tests.testcases import INPRO_VALID1, INPRO_VALID2, INPRO_VALID2, TECHREPORT_VALID, ARTICLE_VALID, PHD_VALID
 from database_connection import get_database_connection
 
@@ -93,6 +100,171 @@ class TestReference(unittest.TestCase):
         if os.path.exists(VALID_FILE_NAME):
             os.remove(VALID_FILE_NAME)
 
+    def test_save_to_file_writes_every_reference_in_key_order(self):
+        self.repository.save_many([self.test_ref2, self.test_ref1, self.test_ref3])
+        with open(VALID_FILE_NAME, "w", encoding="utf-8") as old_file:
+            old_file.write("old contents")
+        self.repository.save_to_file(VALID_FILE_NAME)
+        with open(VALID_FILE_NAME, encoding="utf-8") as saved_file:
+            contents = saved_file.read()
+        os.remove(VALID_FILE_NAME)
+        self.assertEqual(contents, "".join(f"{reference}\n"
+                                           for reference in self.repository.load_all()))
+        self.assertEqual([name for name in os.listdir("data") if name.endswith(".tmp")], [])
+
+    def test_save_to_file_saves_only_references_matching_filter(self):
+        finnish = Reference(ReferenceType.ARTICLE, "Aijala22",
+                            dict(self.test_ref3.fields, author="Äijälä, Öljy", year=2022))
+        self.repository.save_many([self.inpro_all, self.test_ref1, self.test_ref2, self.test_ref3,
+                                   finnish])
+        cases = [
+            (ReferenceFilter(author="äijälä"), [finnish]),
+            (ReferenceFilter(author="ONES"), [self.test_ref1, self.test_ref2]),
+            (ReferenceFilter(author="ones,"), [self.test_ref2]),
+            (ReferenceFilter(year_from=2024, year_to=2024), [self.test_ref3]),
+            (ReferenceFilter(reference_type=ReferenceType.INPROCEEDINGS),
+             [self.inpro_all, self.test_ref1]),
+            (ReferenceFilter(keys=[self.test_ref1.key, self.test_ref3.key, "missing"],
+                             reference_type=ReferenceType.ARTICLE), [self.test_ref3]),
+            (ReferenceFilter(query=self.test_ref2.fields["title"].split()[0]), [self.test_ref2]),
+            (ReferenceFilter(author="%"), [])
+        ]
+        for reference_filter, expected in cases:
+            count = self.repository.save_to_file(VALID_FILE_NAME, reference_filter=reference_filter)
+            with open(VALID_FILE_NAME, encoding="utf-8") as saved_file:
+                contents = saved_file.read()
+            self.assertEqual(count, len(expected))
+            self.assertEqual(contents, "".join(f"{reference}\n" for reference in
+                                               sorted(expected, key=lambda ref: ref.key)))
+        os.remove(VALID_FILE_NAME)
+
+    def test_query_combines_conditions_sorts_and_limits(self):
+        self.repository.save_many([self.inpro_all, self.test_ref1, self.test_ref2,
+                                   self.test_ref3, self.test_ref4])
+        cases = [
+            (ReferenceQuery(Contains("author", "jones") & YearBetween(year_to=2020)), ["Jones11"]),
+            (ReferenceQuery(TypeIn(ReferenceType.ARTICLE, ReferenceType.PHD) |
+                            KeyStartsWith("Ga"), order_by=["-year"]),
+             ["Johnson24", "Garcia23", "Miller20"]),
+            (ReferenceQuery(Contains("journal", "FINANCIAL") | Contains("booktitle", "data")),
+             ["Johnson24", "Jonessen23"]),
+            (ReferenceQuery(YearBetween(2020, 2023), order_by=["year", "-key"], limit=2),
+             ["Miller20", "Jonessen23"]),
+            (ReferenceQuery(KeyStartsWith("jo")), []),
+            (ReferenceQuery(Contains("title", "%")), []),
+            (ReferenceQuery(), ["Garcia23", "Johnson24", "Jones11", "Jonessen23", "Miller20"])
+        ]
+        for reference_query, expected in cases:
+            self.assertEqual([ref.key for ref in self.repository.query(reference_query)], expected)
+
+    def test_query_evaluates_regular_expressions_in_memory(self):
+        self.repository.save_many([self.inpro_all, self.test_ref1, self.test_ref2,
+                                   self.test_ref3, self.test_ref4])
+        by_regex = ReferenceQuery(Matches("author", r"^jones\b") | Matches("key", "^Mil"))
+        self.assertEqual([ref.key for ref in self.repository.query(by_regex)],
+                         ["Jones11", "Miller20"])
+        limited = ReferenceQuery(YearBetween(year_from=2020) & Matches("title", "an"),
+                                 order_by=["-year"], limit=2)
+        self.assertEqual([ref.key for ref in self.repository.query(limited)],
+                         ["Johnson24", "Garcia23"])
+        conditions, _, residual = self.repository._query_conditions(limited.condition)
+        self.assertEqual(len(conditions), 1)
+        self.assertEqual(len(residual), 1)
+
+    def test_filter_is_a_query_condition(self):
+        self.repository.save_many([self.inpro_all, self.test_ref1, self.test_ref2,
+                                   self.test_ref3, self.test_ref4])
+        references = self.repository.load_all()
+        for reference_filter in [ReferenceFilter(author="jones", year_to=2020),
+                                 ReferenceFilter(query="exploring",
+                                                 reference_type=ReferenceType.INPROCEEDINGS),
+                                 ReferenceFilter(keys=["Miller20", "Garcia23"], year_from=2021)]:
+            self.assertEqual([ref.key for ref in self.repository.query(ReferenceQuery(reference_filter))],
+                             [ref.key for ref in references if reference_filter.matches(ref)])
+        self.assertEqual([ref.key for ref in self.repository.query(ReferenceQuery(
+            ReferenceFilter(year_from=2021) & Contains("title", "learning")))], ["Garcia23"])
+
+    def test_contains_folds_case_outside_ascii_in_sql_and_memory(self):
+        finnish = Reference(ReferenceType.ARTICLE, "Aijala22",
+                            dict(self.test_ref3.fields, author="Äijälä, Öljy", year=2022))
+        self.repository.save_many([finnish, self.test_ref3])
+        for text in ["äijälä", "ÄIJÄLÄ", "öljy"]:
+            condition = Contains("author", text)
+            self.assertTrue(condition.matches(finnish))
+            self.assertEqual([ref.key for ref in self.repository.query(ReferenceQuery(condition))],
+                             ["Aijala22"])
+            with_residual = ReferenceQuery(condition | Matches("title", "zzz"))
+            self.assertEqual([ref.key for ref in self.repository.query(with_residual)],
+                             ["Aijala22"])
+
+    def test_year_range_uses_year_index(self):
+        # Statistics of the test database may make scanning the small table cheaper
+        connection = sqlite3.connect(":memory:")
+        connection.row_factory = sqlite3.Row
+        create_tables(connection)
+        for condition in [YearBetween(2020), YearBetween(year_to=2020), YearBetween(2020, 2021)]:
+            sql, params = self.repository._compile_condition(condition)
+            cursor = connection.cursor()
+            cursor.execute(f"EXPLAIN QUERY PLAN SELECT key FROM Bibrefs WHERE {sql}", params)
+            self.assertIn("Bibrefs_year_idx", " ".join(row["detail"] for row in cursor))
+
+    def test_save_to_file_evaluates_conditions_sql_can_not_express(self):
+        self.repository.save_many([self.test_ref1, self.test_ref2, self.test_ref3])
+        count = self.repository.save_to_file(
+            VALID_FILE_NAME, reference_filter=Matches("author", r"^jones\b") | KeyStartsWith("Joh"))
+        with open(VALID_FILE_NAME, encoding="utf-8") as saved_file:
+            contents = saved_file.read()
+        os.remove(VALID_FILE_NAME)
+        self.assertEqual(count, 2)
+        self.assertEqual(contents, f"{self.test_ref3}\n{self.test_ref2}\n")
+
+    def test_query_by_invalid_field_raises_error(self):
+        with pytest.raises(ValueError, match=INVALID_QUERY_FIELD_ERROR):
+            Contains("school", "University")
+        with pytest.raises(ValueError, match=INVALID_QUERY_FIELD_ERROR):
+            ReferenceQuery(order_by=["-month"])
+
+    def test_fuzzy_search_finds_misspelled_author_and_title(self):
+        self.repository.save_many([self.inpro_all, self.test_ref1, self.test_ref2,
+                                   self.test_ref3, self.test_ref4])
+        self.assertEqual([ref.key for ref in self.repository.fuzzy_search("Emma Miler")],
+                         ["Miller20"])
+        self.assertEqual([ref.key for ref in self.repository.fuzzy_search(
+            "patterns of data analysys", ["title"])], ["Jonessen23"])
+        self.assertEqual([ref.key for ref in self.repository.fuzzy_search("Jonnes", limit=2)],
+                         ["Jones11", "Jonessen23"])
+        self.assertEqual(self.repository.fuzzy_search("Jo"), [])
+        self.assertEqual(self.repository.fuzzy_search("Miller", ["author"])[0].key, "Miller20")
+
+        self.repository.update_fields("Miller20", {"author": "Someone, Else"})
+        self.assertEqual(self.repository.fuzzy_search("Emma Miler"), [])
+        self.repository.delete_from_db("Jones11")
+        self.assertEqual([ref.key for ref in self.repository.fuzzy_search("Jonnes")],
+                         ["Jonessen23"])
+        with pytest.raises(ValueError, match=INVALID_SEARCH_FIELD_ERROR):
+            self.repository.fuzzy_search("Journal", ["journal"])
+
+    def test_stored_bibtex_is_refreshed_on_every_write(self):
+        def stored_bibtex(key):
+            cursor = get_database_connection().cursor()
+            cursor.execute("SELECT bibtex FROM Bibrefs WHERE key = ?", (key,))
+            return cursor.fetchone()["bibtex"]
+
+        self.repository.save(self.test_ref1)
+        self.repository.save_many([self.test_ref2])
+        for key in (self.test_ref1.key, self.test_ref2.key):
+            self.assertEqual(stored_bibtex(key), str(self.repository.load_one(key)))
+
+        self.repository.update_fields(self.test_ref1.key, {"title": "Changed", "author": "Doe"})
+        self.assertEqual(stored_bibtex(self.test_ref1.key),
+                         str(self.repository.load_one(self.test_ref1.key)))
+        self.assertIn("{Changed}", stored_bibtex(self.test_ref1.key))
+
+        changed = Reference(self.test_ref2.reference_type, self.test_ref2.key,
+                            dict(self.test_ref2.fields, note="Imported again"))
+        self.repository.save_many([changed], overwrite=True)
+        self.assertIn("{Imported again}", stored_bibtex(self.test_ref2.key))
+
     def test_non_supported_entry_type_raises_error(self):
         """Add directely to SQL database reference type_id
         not supported by program, and ensure that correct
@@ -106,3 +278,164 @@ class TestReference(unittest.TestCase):
         connection.commit()
         with pytest.raises(ValueError, match=INVALID_REFERENCE_TYPE_ERROR):
             self.repository.load_one("Author23")
+
+    def test_iter_all_yields_references_in_key_order(self):
+        self.repository.save(self.test_ref2)
+        self.repository.save(self.test_ref1)
+        references = self.repository.iter_all()
+        self.assertNotIsInstance(references, list)
+        keys = [reference.key for reference in references]
+        self.assertEqual(keys, sorted([self.test_ref1.key, self.test_ref2.key]))
+
+    def test_load_all_returns_same_fields_as_load_one(self):
+        self.repository.save(self.test_ref3)
+        self.repository.save(self.test_ref4)
+        for reference in self.repository.load_all():
+            loaded = self.repository.load_one(reference.key)
+            self.assertEqual(reference.reference_type, loaded.reference_type)
+            self.assertEqual(reference.fields, loaded.fields)
+
+    def test_save_many_saves_all_valid_references(self):
+        errors = self.repository.save_many(
+            [self.test_ref1, self.test_ref2, self.test_ref3, self.test_ref4])
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.repository.load_all()), 4)
+
+    def test_save_many_reports_failed_references_and_saves_rest(self):
+        self.repository.save(self.test_ref1)
+        missing_author = Reference(ReferenceType.ARTICLE, "NoAuthor23",
+                                   {"title": "Title", "journal": "Journal", "year": 2023})
+        errors = self.repository.save_many(
+            [self.test_ref2, self.test_ref1, missing_author, self.test_ref3, self.test_ref3])
+        self.assertEqual([key for key, _ in errors],
+                         [self.test_ref1.key, "NoAuthor23", self.test_ref3.key])
+        self.assertEqual(str(errors[0][1]), KEY_ALREADY_EXISTS_ERROR)
+        self.assertEqual(str(errors[1][1]), MISSING_FIELD_ERROR)
+        self.assertEqual(len(self.repository.load_all()), 3)
+
+    def test_save_many_overwrites_existing_references(self):
+        self.repository.save(self.test_ref1)
+        changed = Reference(self.test_ref1.reference_type, self.test_ref1.key,
+                            dict(self.test_ref1.fields, title="Changed title"))
+        errors = self.repository.save_many([changed, self.test_ref2], overwrite=True)
+        self.assertEqual(errors, [])
+        self.assertEqual(self.repository.load_one(self.test_ref1.key).fields["title"],
+                         "Changed title")
+        self.assertEqual(len(self.repository.search("changed")), 1)
+        self.assertEqual(len(self.repository.load_all()), 2)
+
+    def test_save_many_reuses_lookup_rows(self):
+        self.repository.save_many([self.test_ref1, self.inpro_all])
+        cursor = get_database_connection().cursor()
+        cursor.execute("SELECT COUNT(*) FROM Referencetypes")
+        self.assertEqual(cursor.fetchone()[0], 1)
+        cursor.execute("SELECT COUNT(*) FROM Authors")
+        self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_save_many_rolls_back_lookup_rows_on_error(self):
+        unbindable = Reference(ReferenceType.INPROCEEDINGS, "Unbindable23",
+                               dict(self.inpro_all.fields, series=object()))
+        with pytest.raises(sqlite3.Error):
+            self.repository.save_many([self.test_ref1, unbindable])
+        cursor = get_database_connection().cursor()
+        cursor.execute("SELECT COUNT(*) FROM Authors")
+        self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertEqual(self.repository.load_all(), [])
+
+    def test_search_matches_word_prefixes(self):
+        self.repository.save_many([self.test_ref1, self.test_ref2, self.test_ref3])
+        results = self.repository.search("explor patt")
+        self.assertEqual([reference.key for reference in results], [self.test_ref1.key])
+
+    def test_search_only_from_given_fields(self):
+        self.repository.save_many([self.test_ref1, self.test_ref3])
+        self.assertEqual(len(self.repository.search("Jonessen", ["title"])), 0)
+        self.assertEqual(len(self.repository.search("Jonessen", ["author"])), 1)
+
+    def test_search_is_updated_on_delete(self):
+        self.repository.save(self.test_ref1)
+        self.repository.delete_from_db(self.test_ref1.key)
+        self.assertEqual(self.repository.search("Exploring"), [])
+
+    def test_search_with_invalid_field_raises_error(self):
+        with pytest.raises(ValueError, match=INVALID_SEARCH_FIELD_ERROR):
+            self.repository.search("Exploring", ["year"])
+
+    def test_get_free_key_returns_stem_when_unused(self):
+        self.assertEqual(self.repository.get_free_key("jonessen23"), "jonessen23")
+
+    def test_get_free_key_uses_next_free_suffix(self):
+        self.repository.save(self.test_ref1)
+        self.assertEqual(self.repository.get_free_key("Jonessen23"), "Jonessen23_1")
+        self.assertEqual(self.repository.get_free_key("Jonessen2"), "Jonessen2")
+
+    def test_get_free_key_skips_reserved_keys(self):
+        self.repository.save(self.test_ref1)
+        reserved = {"Jonessen23_1", "Jonessen23_2", "Other23"}
+        self.assertEqual(self.repository.get_free_key("Jonessen23", reserved), "Jonessen23_3")
+        self.assertEqual(self.repository.get_free_key("Other23", reserved), "Other23_1")
+
+    def test_list_keys_returns_pages_after_given_key(self):
+        self.repository.save_many([self.test_ref1, self.test_ref2, self.test_ref3, self.test_ref4])
+        keys = sorted(reference.key for reference in self.repository.load_all())
+        first_page = self.repository.list_keys(limit=3)
+        second_page = self.repository.list_keys(first_page[-1], 3)
+        self.assertEqual(first_page + second_page, keys)
+
+    def test_list_keys_in_descending_order(self):
+        self.repository.save_many([self.test_ref1, self.test_ref2, self.test_ref3])
+        keys = sorted((reference.key for reference in self.repository.load_all()), reverse=True)
+        self.assertEqual(self.repository.list_keys(order="desc"), keys)
+        self.assertEqual(self.repository.list_keys(keys[0], order="desc"), keys[1:])
+
+    def test_list_keys_with_invalid_order_raises_error(self):
+        with pytest.raises(ValueError, match=INVALID_ORDER_ERROR):
+            self.repository.list_keys(order="random")
+
+    def test_update_fields_changes_only_given_fields(self):
+        self.repository.save(self.test_ref1)
+        updated = self.repository.update_fields(
+            self.test_ref1.key, {"title": "New title", "editor": "New, Editor", "year": "2024"})
+        self.assertEqual(updated.fields["title"], "New title")
+        self.assertEqual(updated.fields["editor"], "New, Editor")
+        self.assertEqual(updated.fields["year"], 2024)
+        self.assertEqual(updated.fields["author"], self.test_ref1.fields["author"])
+        self.assertEqual(self.repository.search("new title")[0].key, self.test_ref1.key)
+
+    def test_update_fields_with_unknown_key_raises_error(self):
+        with pytest.raises(ValueError, match=KEY_DOES_NOT_EXIST_ERROR):
+            self.repository.update_fields("NON-EXISTENT", {"title": "New title"})
+
+    def test_update_fields_with_unknown_field_raises_error(self):
+        self.repository.save(self.test_ref1)
+        with pytest.raises(ValueError, match=EXTRA_KEYS_ERROR):
+            self.repository.update_fields(self.test_ref1.key, {"doi": "10.1000/1"})
+
+    def test_update_fields_outside_layout_of_type_raises_error(self):
+        self.repository.save(self.test_ref3)
+        with pytest.raises(ValueError, match=EXTRA_KEYS_ERROR):
+            self.repository.update_fields(self.test_ref3.key, {"title": "New", "school": "Uni"})
+        cursor = get_database_connection().cursor()
+        cursor.execute("SELECT title, school FROM Bibrefs WHERE key = ?", (self.test_ref3.key,))
+        self.assertEqual(tuple(cursor.fetchone()), (self.test_ref3.fields["title"], None))
+
+    def test_delete_many_deletes_given_keys(self):
+        self.repository.save_many([self.test_ref1, self.test_ref2, self.test_ref3])
+        deleted = self.repository.delete_many([self.test_ref1.key, self.test_ref3.key, "Missing"])
+        self.assertEqual(deleted, 2)
+        self.assertEqual([reference.key for reference in self.repository.load_all()],
+                         [self.test_ref2.key])
+
+    def test_compact_removes_unused_lookup_rows(self):
+        self.repository.save_many([self.test_ref1, self.test_ref2])
+        self.repository.delete_from_db(self.test_ref1.key)
+        cursor = get_database_connection().cursor()
+        cursor.execute("SELECT COUNT(*) FROM Authors")
+        self.assertEqual(cursor.fetchone()[0], 2)
+
+        self.repository.compact()
+
+        cursor.execute("SELECT author FROM Authors")
+        self.assertEqual([row[0] for row in cursor.fetchall()], [self.test_ref2.fields["author"]])
+        cursor.execute("SELECT COUNT(*) FROM Booktitles")
+        self.assertEqual(cursor.fetchone()[0], 0)
@@ -1,13 +1,19 @@
 """Unittests for reference_services module"""
+import os
+import shutil
+import tempfile
 import unittest
 import pytest
 from repositories.reference_repository import ReferenceRepository
-from services.reference_services import ReferenceServices
+from repositories.import_repository import ImportRepository
+from services.reference_services import ReferenceServices, DuplicatePolicy
+from services.reference_snapshot import create_snapshot, np
 from entities.reference import ReferenceType
 from constants import MISSING_FIELD_ERROR, YEAR_FORMAT_ERROR, \
     MONTH_FORMAT_ERROR, VOLUME_FORMAT_ERROR, PAGES_FORMAT_ERROR, \
     EXTRA_KEYS_ERROR, ROOT_DIR, KEY_ALREADY_EXISTS_ERROR
 from tests.testcases import INPRO_VALID1
+from database_connection import get_database_connection
 
 
 class TestReferenceServices(unittest.TestCase):
@@ -186,6 +192,17 @@ class TestReferenceServices(unittest.TestCase):
         res = self.ref_services.filter_references(refs, 1, "1973")
         self.assertEqual(len(res), 0)
 
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_filtering_snapshot_matches_filtering_list(self):
+        self.inpro["author"] = "Reed, Lou"
+        self.inpro["year"] = 1972
+        self.ref_services.create_reference(ReferenceType.INPROCEEDINGS, self.inpro)
+        refs = self.repository.load_all()
+        snapshot = create_snapshot(refs)
+        for option, arg in [(0, "rEed"), (1, "97"), (2, "NOT FOUND"), (0, "")]:
+            self.assertEqual(self.ref_services.filter_references(snapshot, option, arg),
+                             self.ref_services.filter_references(refs, option, arg))
+
     def test_add_valid_from_file_no_errors(self):
         """Tests that adding valid references from file does not cause errors
         and unsupported types are just passed"""
@@ -210,3 +227,236 @@ class TestReferenceServices(unittest.TestCase):
         self.ref_services.delete_reference(orig_refs[0].key)
         new_length = len(self.repository.load_all())
         self.assertEqual(orig_length, new_length+1)
+
+    def test_searching_references(self):
+        """Test for searching references from full-text index"""
+        self.repository.empty_all_tables()
+        self.inpro["author"] = "Reed, Lou"
+        self.inpro["title"] = "Walk on the Wild Side"
+        self.inpro["year"] = 1972
+        self.ref_services.create_reference(
+            ReferenceType.INPROCEEDINGS, self.inpro)
+        refs = self.repository.load_all()
+        self.assertEqual(len(self.ref_services.search_references(refs, 0, "lou re")), 1)
+        self.assertEqual(len(self.ref_services.search_references(refs, 0, "wild")), 0)
+        self.assertEqual(len(self.ref_services.search_references(refs, 2, "wild si")), 1)
+        self.assertEqual(len(self.ref_services.search_references(refs, 1, "197")), 1)
+        self.assertEqual(len(self.ref_services.search_references(refs, 3, "Reedd, Lou")), 1)
+
+    def test_constructed_keys_are_unique_within_one_import(self):
+        """Keys constructed for entries without key do not collide before saving"""
+        self.repository.empty_all_tables()
+        reserved = set()
+        for _ in range(3):
+            reserved.add(self.ref_services.construct_bibtex_key("Smith, John", 2023, reserved))
+        self.assertSetEqual(reserved, {"smith23", "smith23_1", "smith23_2"})
+
+    def test_update_reference_validates_fields(self):
+        """Tests that invalid field is not updated"""
+        key = self.ref_services.create_reference(ReferenceType.INPROCEEDINGS, self.inpro)
+        with pytest.raises(ValueError, match=YEAR_FORMAT_ERROR):
+            self.ref_services.update_reference(key, {"year": "20"})
+        updated = self.ref_services.update_reference(key, {"pages": "1--2"})
+        self.assertEqual(updated.fields["pages"], "1--2")
+        self.assertEqual(self.repository.load_one(key).fields["year"], 2023)
+
+    def test_add_from_file_in_small_batches(self):
+        """Tests that importing in batches saves every reference"""
+        self.repository.empty_all_tables()
+        errors = self.ref_services.add_from_file("data/errors.bib", batch_size=1)
+        self.assertEqual([str(error) for _, error in errors],
+                         [EXTRA_KEYS_ERROR, KEY_ALREADY_EXISTS_ERROR])
+        self.assertEqual(len(self.repository.load_all()), 2)
+
+    def test_add_from_file_with_worker_processes(self):
+        """Tests that parallel import gives same errors in same order"""
+        self.repository.empty_all_tables()
+        errors = self.ref_services.add_from_file("data/errors.bib", batch_size=1, workers=2)
+        self.assertEqual([(key, str(error)) for key, error in errors],
+                         [("smithson25", EXTRA_KEYS_ERROR), ("smithson11", KEY_ALREADY_EXISTS_ERROR)])
+        self.assertEqual(len(self.repository.load_all()), 2)
+
+    def _save_test_build_without_import(self):
+        """Saves references of data/test_build.bib as if they were added by hand"""
+        self.repository.empty_all_tables()
+        self.ref_services.add_from_file("data/test_build.bib")
+        references = self.repository.load_all()
+        self.repository.empty_all_tables()
+        for reference in references:
+            reference.fields["title"] = "Added by hand"
+        self.repository.save_many(references)
+        return len(references)
+
+    def test_import_skips_existing_keys(self):
+        """Tests that entries already in database are reported and not written"""
+        count = self._save_test_build_without_import()
+        errors = self.ref_services.add_from_file("data/test_build.bib")
+        self.assertEqual(len(errors), count)
+        self.assertTrue(all(error == KEY_ALREADY_EXISTS_ERROR for _, error in errors))
+        self.assertEqual(self.repository.load_one("johnson24").fields["title"], "Added by hand")
+
+    def test_import_overwrites_existing_keys(self):
+        """Tests that overwrite policy replaces fields of existing references"""
+        count = self._save_test_build_without_import()
+        errors = self.ref_services.add_from_file(
+            "data/test_build.bib", on_duplicate=DuplicatePolicy.OVERWRITE)
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.repository.load_all()), count)
+        self.assertEqual(self.repository.load_one("johnson24").fields["title"],
+                         "Predictive Power of Financial Indicators in Assessing Corporate Performance")
+
+    def test_import_renames_existing_keys(self):
+        """Tests that rename policy saves duplicates with free keys"""
+        count = self._save_test_build_without_import()
+        errors = self.ref_services.add_from_file(
+            "data/test_build.bib", on_duplicate=DuplicatePolicy.RENAME)
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.repository.load_all()), count * 2)
+        self.assertEqual(self.repository.load_one("johnson24_1").fields["title"],
+                         "Predictive Power of Financial Indicators in Assessing Corporate Performance")
+
+    def test_reimport_with_rename_recognizes_renamed_entries(self):
+        """Tests that entries renamed on import are unchanged or changed when
+        the file is imported again, not renamed again"""
+        count = self._save_test_build_without_import()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "refs.bib")
+            shutil.copy("data/test_build.bib", path)
+            self.ref_services.add_from_file(path, on_duplicate=DuplicatePolicy.RENAME)
+            connection = get_database_connection()
+            changes = connection.total_changes
+            errors = self.ref_services.add_from_file(
+                path, on_duplicate=DuplicatePolicy.RENAME, flag_missing=True)
+            self.assertEqual(errors, [])
+            self.assertEqual(connection.total_changes, changes)
+
+            with open(path, encoding="utf-8") as bib_file:
+                changed = bib_file.read().replace(
+                    "Advancements in Network Security Protocols", "Changed")
+            with open(path, "w", encoding="utf-8") as bib_file:
+                bib_file.write(changed)
+            errors = self.ref_services.add_from_file(path, on_duplicate=DuplicatePolicy.RENAME)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.repository.load_all()), count * 2)
+        self.assertEqual(self.repository.load_one("jones11_1").fields["title"], "Changed")
+        self.assertEqual(self.repository.load_one("jones11").fields["title"], "Added by hand")
+
+    def test_reimport_of_unchanged_file_does_not_write(self):
+        """Tests that unchanged entries are skipped without errors or writes"""
+        self.repository.empty_all_tables()
+        self.ref_services.add_from_file("data/test_build.bib")
+        connection = get_database_connection()
+        changes = connection.total_changes
+        errors = self.ref_services.add_from_file("data/test_build.bib", flag_missing=True)
+        self.assertEqual(errors, [])
+        self.assertEqual(connection.total_changes, changes)
+
+    def test_later_copy_of_key_in_another_batch_is_duplicate(self):
+        """Tests that a key repeated batches later is reported and never saved,
+        also when the file is imported again or resumed"""
+        self.repository.empty_all_tables()
+        entry = "@article{{{key},\n  title = {{{title}}},\n  author = {{{author}}},\n" \
+            "  journal = {{Journal}},\n  year = {{2023}}\n}}\n\n"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "refs.bib")
+            with open(path, "w", encoding="utf-8") as bib_file:
+                for number in range(1, 30):
+                    bib_file.write(entry.format(key=f"k{number}", title=f"Title {number}",
+                                                author=f"Auth{number}, X"))
+                bib_file.write(entry.format(key="k1", title="Dup", author="Dup, X"))
+
+            duplicate = [("k1", KEY_ALREADY_EXISTS_ERROR)]
+            self.assertEqual(self.ref_services.add_from_file(path, batch_size=7), duplicate)
+            connection = get_database_connection()
+            changes = connection.total_changes
+            self.assertEqual(self.ref_services.add_from_file(path, batch_size=7), duplicate)
+            self.assertEqual(connection.total_changes, changes)
+
+            def interrupt(*_):
+                raise KeyboardInterrupt
+            self.repository.empty_all_tables()
+            with pytest.raises(KeyboardInterrupt):
+                self.ref_services.add_from_file(path, batch_size=7, progress=interrupt)
+            self.assertEqual(self.ref_services.add_from_file(path, batch_size=7, resume=True),
+                             duplicate)
+
+        self.assertEqual(len(self.repository.load_all()), 29)
+        self.assertEqual(self.repository.load_one("k1").fields["author"], "Auth1, X")
+
+    def test_reimport_updates_changed_and_flags_missing_entries(self):
+        """Tests that changed entries are updated in place and removed ones flagged"""
+        self.repository.empty_all_tables()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "refs.bib")
+            with open("data/test_build.bib", encoding="utf-8") as bib_file:
+                original = bib_file.read()
+            with open(path, "w", encoding="utf-8") as bib_file:
+                bib_file.write(original)
+            self.ref_services.add_from_file(path)
+            count = len(self.repository.load_all())
+
+            changed = original.replace("Advancements in Network Security Protocols", "Changed")
+            changed = changed[:changed.index("@inproceedings{garcia23")]
+            with open(path, "w", encoding="utf-8") as bib_file:
+                bib_file.write(changed)
+            errors = self.ref_services.add_from_file(path, flag_missing=True)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.repository.load_all()), count)
+        self.assertEqual(self.repository.load_one("jones11").fields["title"], "Changed")
+        self.assertEqual(ImportRepository().get_missing_keys(os.path.realpath(path)),
+                         ["garcia23", "jonessen23"])
+        self.assertEqual(ImportRepository().get_missing_keys("other.bib"), [])
+
+    def test_interrupted_import_can_be_resumed_from_checkpoint(self):
+        """Tests that resumed import continues after the last saved batch"""
+        self.repository.empty_all_tables()
+        source = os.path.realpath("data/test_build.bib")
+        calls = []
+
+        def interrupt(entries, offset, size):
+            calls.append((entries, offset, size))
+            raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            self.ref_services.add_from_file("data/test_build.bib", batch_size=2,
+                                            progress=interrupt)
+        self.assertEqual(len(self.repository.load_all()), 2)
+        self.assertEqual(ImportRepository().get_checkpoint(source), calls[0][1::-1])
+
+        self.ref_services.add_from_file("data/test_build.bib", batch_size=2, resume=True,
+                                        progress=lambda *args: calls.append(args))
+        self.assertEqual(calls[1][0], 4)
+        self.assertEqual(calls[-1][1:], (os.path.getsize(source), os.path.getsize(source)))
+        self.assertEqual(len(self.repository.load_all()), 4)
+        self.assertIsNone(ImportRepository().get_checkpoint(source))
+
+    def test_add_from_files_imports_every_file_of_directory(self):
+        """Tests that files of a folder and its subfolders are imported
+        and errors are reported per file"""
+        self.repository.empty_all_tables()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.mkdir(os.path.join(tmp_dir, "project"))
+            paths = [os.path.join(tmp_dir, "errors.bib"),
+                     os.path.join(tmp_dir, "project", "build.bib")]
+            shutil.copy("data/errors.bib", paths[0])
+            shutil.copy("data/test_build.bib", paths[1])
+            calls = []
+            errors = self.ref_services.add_from_files(
+                tmp_dir, batch_size=1, workers=2, progress=lambda *args: calls.append(args))
+
+        self.assertEqual(list(errors), paths)
+        self.assertEqual([key for key, _ in errors[paths[0]]], ["smithson25", "smithson11"])
+        self.assertEqual(errors[paths[1]], [])
+        self.assertEqual(len(self.repository.load_all()), 6)
+        self.assertEqual(calls[-1][0], 10)
+        self.assertEqual(calls[-1][1], calls[-1][2])
+        # References imported from removed files would collide with other tests
+        self.repository.empty_all_tables()
+
+    def test_add_from_files_accepts_glob_pattern(self):
+        """Tests that only files matching the pattern are imported"""
+        self.repository.empty_all_tables()
+        errors = self.ref_services.add_from_files("data/test_*.bib")
+        self.assertEqual(errors, {"data/test_build.bib": []})
@@ -0,0 +1,79 @@
+"""Unittests for reference snapshot module"""
+import unittest
+from unittest.mock import patch
+import pytest
+from entities.reference import Reference, ReferenceType
+from services.reference_snapshot import ReferenceSnapshot, create_snapshot, np
+
+
+def references():
+    return [
+        Reference(ReferenceType.ARTICLE, "reed72",
+                  {"title": "Walk on the Wild Side", "author": "Reed, Lou", "year": 1972}),
+        Reference(ReferenceType.INPROCEEDINGS, "cale73",
+                  {"title": "Paris 1919", "author": "Cale, John", "year": 1973}),
+        Reference(ReferenceType.PHD, "nico",
+                  {"title": "Chelsea Girl", "author": "Nico"}),
+        Reference(ReferenceType.ARTICLE, "reed89",
+                  {"title": "Dirty Blvd.", "author": "Reed, Lou", "year": 1989})
+    ]
+
+
+class TestReferenceSnapshotWithoutNumpy(unittest.TestCase):
+    """Tests for behaviour when NumPy is not installed"""
+
+    def test_create_snapshot_returns_list(self):
+        refs = references()
+        with patch("services.reference_snapshot.np", None):
+            self.assertIs(create_snapshot(refs), refs)
+            with pytest.raises(ImportError):
+                ReferenceSnapshot(refs)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestReferenceSnapshot(unittest.TestCase):
+    """Unittests for reference snapshot module"""
+
+    def setUp(self):
+        self.snapshot = create_snapshot(references())
+
+    def keys(self, indices):
+        return [reference.key for reference in self.snapshot.take(indices)]
+
+    def test_years_between(self):
+        self.assertEqual(self.keys(self.snapshot.years_between(1972, 1973)), ["reed72", "cale73"])
+        self.assertEqual(self.keys(self.snapshot.years_between(year_from=1973)),
+                         ["cale73", "reed89"])
+        self.assertEqual(self.keys(self.snapshot.years_between()), ["reed72", "cale73", "reed89"])
+
+    def test_of_types(self):
+        self.assertEqual(self.keys(self.snapshot.of_types([ReferenceType.ARTICLE])),
+                         ["reed72", "reed89"])
+        self.assertEqual(self.keys(self.snapshot.of_types([])), [])
+
+    def test_containing_ignores_case_and_stays_inside_values(self):
+        self.assertEqual(self.keys(self.snapshot.containing("author", "REED")),
+                         ["reed72", "reed89"])
+        self.assertEqual(self.keys(self.snapshot.containing("title", "wild")), ["reed72"])
+        self.assertEqual(self.keys(self.snapshot.containing("year", "97")), ["reed72", "cale73"])
+        self.assertEqual(self.keys(self.snapshot.containing("author", "lou\x00cale")), [])
+        self.assertEqual(len(self.snapshot.containing("title", "")), 4)
+
+    def test_filters_can_be_combined(self):
+        indices = np.intersect1d(self.snapshot.containing("author", "reed"),
+                                 self.snapshot.years_between(year_to=1980))
+        self.assertEqual(self.keys(indices), ["reed72"])
+
+    def test_empty_snapshot(self):
+        snapshot = create_snapshot([])
+        self.assertEqual(len(snapshot.containing("author", "reed")), 0)
+        self.assertEqual(len(snapshot.years_between(1970)), 0)
+
+    def test_columns_are_built_when_first_used(self):
+        self.snapshot.containing("year", "19")
+        self.assertEqual(list(self.snapshot._texts), ["year"])
+        self.assertNotIn("years", vars(self.snapshot))
+        self.snapshot.years_between(1980)
+        self.assertIn("years", vars(self.snapshot))
+        with pytest.raises(ValueError):
+            self.snapshot.containing("journal", "x")
@@ -76,3 +76,28 @@ class TestReference(unittest.TestCase):
     def test_non_supported_raises_error(self):
         with pytest.raises(ValueError):
             techreport = ReferenceType("non-supported")
+
+    def test_fields_are_kept_in_layout_order(self):
+        reference = Reference(ReferenceType.ARTICLE, "key2",
+                              {"year": 2020, "author": "Doe", "note": None, "title": "Title"})
+        self.assertEqual(list(reference.fields), ["title", "author", "year"])
+        self.assertEqual(len(reference.fields), 3)
+        self.assertEqual(reference.values, ("Title", "Doe", 2020))
+
+    def test_fields_can_be_changed_like_dict(self):
+        self.ref.fields.update({"year": 2021, "author": "Doe"})
+        self.ref.fields["title"] = "Changed"
+        del self.ref.fields["author"]
+        self.assertEqual(dict(self.ref.fields), {"title": "Changed", "year": 2021})
+        self.assertIsNone(self.ref.fields.get("author"))
+        self.assertEqual(self.ref.fields, {"title": "Changed", "year": 2021})
+
+    def test_field_outside_layout_raises_error(self):
+        with pytest.raises(KeyError):
+            Reference(ReferenceType.INPROCEEDINGS, "key2", {"journal": "Journal"})
+        with pytest.raises(KeyError):
+            self.ref.fields["journal"] = "Journal"
+
+    def test_reference_has_no_instance_dict(self):
+        self.assertFalse(hasattr(self.ref, "__dict__"))
+        self.assertFalse(hasattr(self.ref.fields, "__dict__"))
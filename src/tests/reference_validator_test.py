@@ -0,0 +1,41 @@
+"""Unittests for reference_validator module"""
+import unittest
+from entities.reference import ReferenceType
+from services.reference_validator import VALIDATORS, validate_batch
+from constants import MISSING_FIELD_ERROR, YEAR_FORMAT_ERROR, MONTH_FORMAT_ERROR, \
+    PAGES_FORMAT_ERROR, EXTRA_KEYS_ERROR
+
+
+class TestReferenceValidator(unittest.TestCase):
+    """Unittests for reference_validator module"""
+
+    def setUp(self):
+        self.validator = VALIDATORS[ReferenceType.ARTICLE]
+        self.article = {
+            "title": "Title",
+            "author": "Smith, John",
+            "journal": "Journal",
+            "year": 2023,
+            "month": "July"
+        }
+
+    def test_valid_fields_have_no_errors(self):
+        self.assertEqual(self.validator.validate(self.article), [])
+
+    def test_every_error_is_reported(self):
+        self.article.update({"year": "23", "pages": "one", "booktitle": "Book"})
+        del self.article["title"]
+        self.assertEqual(self.validator.validate(self.article),
+                         [EXTRA_KEYS_ERROR, MISSING_FIELD_ERROR, YEAR_FORMAT_ERROR,
+                          PAGES_FORMAT_ERROR])
+
+    def test_validate_batch_keeps_order(self):
+        invalid = dict(self.article, month="tammikuu")
+        self.assertEqual(validate_batch([(ReferenceType.ARTICLE, invalid),
+                                         (ReferenceType.ARTICLE, self.article)]),
+                         [[MONTH_FORMAT_ERROR], []])
+
+    def test_validate_batch_of_different_types(self):
+        errors = validate_batch([(ReferenceType.ARTICLE, self.article),
+                                 (ReferenceType.TECHREPORT, self.article)])
+        self.assertEqual(errors, [[], [EXTRA_KEYS_ERROR, MISSING_FIELD_ERROR]])
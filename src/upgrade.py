@@ -0,0 +1,10 @@
+""" Module to upgrade existing database file to the latest schema """
+from initialize_database import upgrade_database
+
+
+def upgrade():
+    """ Calls upgrade_database """
+    upgrade_database()
+
+if __name__ == "__main__":
+    upgrade()
@@ -31,3 +31,19 @@ def lint(c):
 @task
 def build(ctx):
     ctx.run('python3 src/build.py', pty=True)
+
+
+@task
+def upgrade(ctx):
+    ctx.run('python3 src/upgrade.py', pty=True)
+
+
+@task
+def compact(ctx):
+    ctx.run('python3 src/compact.py', pty=True)
+
+
+@task
+def export(ctx, directory="export", field="year", compression="gzip", workers=None):
+    workers = "" if workers is None else workers
+    ctx.run(f'python3 src/export_shards.py {directory} {field} {compression} {workers}', pty=True)